@@ -0,0 +1,68 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class GlyphAtlas():
+
+    # Every glyph mask of a font sheet in one (256, height, width) array,
+    # so a block of console cells can be composited into an RGB frame with
+    # a handful of array operations instead of one draw call per glyph.
+
+    def __init__(self, font_width, font_height, masks):
+
+        if numpy is None:
+            raise ImportError('NumPy is required for GlyphAtlas')
+
+        self.font_width = font_width
+        self.font_height = font_height
+
+        self.masks = numpy.frombuffer(
+            b''.join(b''.join(rows) for rows in masks),
+            dtype=numpy.uint8
+        ).reshape(256, font_height, font_width).astype(numpy.bool_)
+
+    def composite(self, console, pixels, left, top, right, bottom):
+
+        # Draws cells left..right, top..bottom (inclusive) of console into
+        # pixels, a (height, width, 3) uint8 array covering the console.
+
+        shape = (console.grid_width, console.grid_height)
+        columns = slice(left, right + 1)
+        rows = slice(top, bottom + 1)
+
+        characters = numpy.frombuffer(
+            console.characters,
+            dtype=numpy.uint8
+        ).reshape(shape)[columns, rows].T
+
+        fg = self.unpack(console.fg_colors, shape, columns, rows)
+        bg = self.unpack(console.bg_colors, shape, columns, rows)
+
+        block = numpy.where(
+            self.masks[characters][..., None],
+            fg[:, :, None, None, :],
+            bg[:, :, None, None, :]
+        )
+
+        height = (bottom - top + 1) * self.font_height
+        width = (right - left + 1) * self.font_width
+
+        pixels[
+            top * self.font_height:top * self.font_height + height,
+            left * self.font_width:left * self.font_width + width
+        ] = block.transpose(0, 2, 1, 3, 4).reshape(height, width, 3)
+
+    def unpack(self, colors, shape, columns, rows):
+
+        packed = numpy.frombuffer(
+            colors,
+            dtype=numpy.uint32
+        ).reshape(shape)[columns, rows].T
+
+        rgb = numpy.empty(packed.shape + (3,), dtype=numpy.uint8)
+        rgb[..., 0] = packed & 0xFF
+        rgb[..., 1] = (packed >> 8) & 0xFF
+        rgb[..., 2] = (packed >> 16) & 0xFF
+
+        return rgb
@@ -1,154 +1,290 @@
+from array import array
 from enum import Enum
-
-import wx
+from itertools import repeat
 
 # Define colors in 0xBBGGRR format
 class Color(Enum):
-	ALICE_BLUE = wx.Colour(0xF0F8FF)
-	ANTIQUE_WHITE = wx.Colour(0xD7EBFA)
-	AQUA = wx.Colour(0xFFFF00)
-	AQUA_MARINE = wx.Colour(0xD4FF7F)
-	AZURE = wx.Colour(0xFFFFF0)
-	BEIGE = wx.Colour(0xDCF5F5)
-	BISQUE = wx.Colour(0xC4E4FF)
-	BLACK = wx.Colour(0x000000)
-	BLANCHED_ALMOND = wx.Colour(0xCDEBFF)
-	BLUE = wx.Colour(0xFF0000)
-	BLUE_VIOLET = wx.Colour(0xE22B8A)
-	BROWN = wx.Colour(0x2A2AA5)
-	BURLY_WOOD = wx.Colour(0x87B8DE)
-	CADET_BLUE = wx.Colour(0xA09E5F)
-	CHARTREUSE = wx.Colour(0x00FF7F)
-	CHOCOLATE = wx.Colour(0x1E69D2)
-	CORAL = wx.Colour(0x507FFF)
-	CORNFLOWER_BLUE = wx.Colour(0xED9564)
-	CORNSILK = wx.Colour(0xDCF8FF)
-	CRIMSON = wx.Colour(0x3C14DC)
-	CYAN = wx.Colour(0xFFFF00)
-	DARK_BLUE = wx.Colour(0x8B0000)
-	DARK_CYAN = wx.Colour(0x8B8B00)
-	DARK_GOLDENROD = wx.Colour(0x0B86B8)
-	DARK_GRAY = wx.Colour(0xA9A9A9)
-	DARK_GREY = wx.Colour(0xA9A9A9)
-	DARK_GREEN = wx.Colour(0x006400)
-	DARK_KHAKI = wx.Colour(0x6BB7BD)
-	DARK_MAGENTA = wx.Colour(0x8B008B)
-	DARK_OLIVE_GREEN = wx.Colour(0x2F6B55)
-	DARK_ORANGE = wx.Colour(0x008CFF)
-	DARK_ORCHID = wx.Colour(0xCC3299)
-	DARK_RED = wx.Colour(0x00008B)
-	DARK_SALMON = wx.Colour(0x7A96E9)
-	DARK_SEA_GREEN = wx.Colour(0x8FBC8F)
-	DARK_SLATE_BLUE = wx.Colour(0x8B3D48)
-	DARK_SLATE_GRAY = wx.Colour(0x4F4F2F)
-	DARK_SLATE_GREY = wx.Colour(0x4F4F2F)
-	DARK_TURQUOISE = wx.Colour(0xD1CE00)
-	DARK_VIOLET = wx.Colour(0xD30094)
-	DEEP_PINK = wx.Colour(0x9314FF)
-	DEEP_SKY_BLUE = wx.Colour(0xFFBF00)
-	DIM_GRAY = wx.Colour(0x696969)
-	DIM_GREY = wx.Colour(0x696969)
-	DODGER_BLUE = wx.Colour(0xFF901E)
-	FIRE_BRICK = wx.Colour(0x2222B2)
-	FLORAL_WHITE = wx.Colour(0xF0FAFF)
-	FOREST_GREEN = wx.Colour(0x228B22)
-	FUCHSIA = wx.Colour(0xFF00FF)
-	GAINSBORO = wx.Colour(0xDCDCDC)
-	GHOST_WHITE = wx.Colour(0xFFF8F8)
-	GOLD = wx.Colour(0x00D7FF)
-	GOLDENROD = wx.Colour(0x20A5DA)
-	GRAY = wx.Colour(0x808080)
-	GREY = wx.Colour(0x808080)
-	GREEN = wx.Colour(0x008000)
-	GREEN_YELLOW = wx.Colour(0x2FFFAD)
-	HONEYDEW = wx.Colour(0xF0FFF0)
-	HOT_PINK = wx.Colour(0xBF69FF)
-	INDIAN_RED = wx.Colour(0x5C5CCD)
-	INDIGO = wx.Colour(0x82004B)
-	IVORY = wx.Colour(0xF0FFFF)
-	KHAKI = wx.Colour(0x8CE6F0)
-	LAVENDER = wx.Colour(0xFAE6E6)
-	LAVENDER_BLUSH = wx.Colour(0xF5F0FF)
-	LAWN_GREEN = wx.Colour(0x00FC7C)
-	LEMON_CHIFFON = wx.Colour(0xCDFAFF)
-	LIGHT_BLUE = wx.Colour(0xE6D8AD)
-	LIGHT_CORAL = wx.Colour(0x8080F0)
-	LIGHT_CYAN = wx.Colour(0xFFFFE0)
-	LIGHT_GOLDENROD_YELLOW = wx.Colour(0xD2FAFA)
-	LIGHT_GRAY = wx.Colour(0xD3D3D3)
-	LIGHT_GREY = wx.Colour(0xD3D3D3)
-	LIGHT_GREEN = wx.Colour(0x90EE90)
-	LIGHT_PINK = wx.Colour(0xC1B6FF)
-	LIGHT_SALMON = wx.Colour(0x7AA0FF)
-	LIGHT_SEA_GREEN = wx.Colour(0xAAB220)
-	LIGHT_SKY_BLUE = wx.Colour(0xFACE87)
-	LIGHT_SLATE_GRAY = wx.Colour(0x998877)
-	LIGHT_SLATE_GREY = wx.Colour(0x998877)
-	LIGHT_STEEL_BLUE = wx.Colour(0xDEC4B0)
-	LIGHT_YELLOW = wx.Colour(0xE0FFFF)
-	LIME = wx.Colour(0x00FF00)
-	LIME_GREEN = wx.Colour(0x32CD32)
-	LINEN = wx.Colour(0xE6F0FA)
-	MAGENTA = wx.Colour(0xFF00FF)
-	MAROON = wx.Colour(0x000080)
-	MEDIUM_AQUA_MARINE = wx.Colour(0xAACD66)
-	MEDIUM_BLUE = wx.Colour(0xCD0000)
-	MEDIUM_ORCHID = wx.Colour(0xD355BA)
-	MEDIUM_PURPLE = wx.Colour(0xDB7093)
-	MEDIUM_SEA_GREEN = wx.Colour(0x71B33C)
-	MEDIUM_SLATE_BLUE = wx.Colour(0xEE687B)
-	MEDIUM_SPRING_GREEN = wx.Colour(0x9AFA00)
-	MEDIUM_TURQUOISE = wx.Colour(0xCCD148)
-	MEDIUM_VIOLET_RED = wx.Colour(0x8515C7)
-	MIDNIGHT_BLUE = wx.Colour(0x701919)
-	MINT_CREAM = wx.Colour(0xFAFFF5)
-	MISTY_ROSE = wx.Colour(0xE1E4FF)
-	MOCCASIN = wx.Colour(0xB5E4FF)
-	NAVAJO_WHITE = wx.Colour(0xADDEFF)
-	NAVY = wx.Colour(0x800000)
-	OLD_LACE = wx.Colour(0xE6F5FD)
-	OLIVE = wx.Colour(0x008080)
-	OLIVE_DRAB = wx.Colour(0x238E6B)
-	ORANGE = wx.Colour(0x00A5FF)
-	ORANGE_RED = wx.Colour(0x0045FF)
-	ORCHID = wx.Colour(0xD670DA)
-	PALE_GOLDENROD = wx.Colour(0xAAE8EE)
-	PALE_GREEN = wx.Colour(0x98FB98)
-	PALE_TURQUOISE = wx.Colour(0xEEEEAF)
-	PALE_VIOLET_RED = wx.Colour(0x9370DB)
-	PAPAYA_WHIP = wx.Colour(0xD5EFFF)
-	PEACH_PUFF = wx.Colour(0xB9DAFF)
-	PERU = wx.Colour(0x3F85CD)
-	PINK = wx.Colour(0xCBC0FF)
-	PLUM = wx.Colour(0xDDA0DD)
-	POWDER_BLUE = wx.Colour(0xE6E0B0)
-	PURPLE = wx.Colour(0x800080)
-	REBECCA_PURPLE = wx.Colour(0x993366)
-	RED = wx.Colour(0x0000FF)
-	ROSY_BROWN = wx.Colour(0x8F8FBC)
-	ROYAL_BLUE = wx.Colour(0xE16941)
-	SADDLE_BROWN = wx.Colour(0x13458B)
-	SALMON = wx.Colour(0x7280FA)
-	SANDY_BROWN = wx.Colour(0x60A4F4)
-	SEA_GREEN = wx.Colour(0x578B2E)
-	SEA_SHELL = wx.Colour(0xEEF5FF)
-	SIENNA = wx.Colour(0x2D52A0)
-	SILVER = wx.Colour(0xC0C0C0)
-	SKY_BLUE = wx.Colour(0xEBCE87)
-	SLATE_BLUE = wx.Colour(0xCD5A6A)
-	SLATE_GRAY = wx.Colour(0x908070)
-	SLATE_GREY = wx.Colour(0x908070)
-	SNOW = wx.Colour(0xFAFAFF)
-	SPRING_GREEN = wx.Colour(0x7FFF00)
-	STEEL_BLUE = wx.Colour(0xB48246)
-	TAN = wx.Colour(0x8CB4D2)
-	TEAL = wx.Colour(0x808000)
-	THISTLE = wx.Colour(0xD8BFD8)
-	TOMATO = wx.Colour(0x4763FF)
-	TURQUOISE = wx.Colour(0xD0E040)
-	VIOLET = wx.Colour(0xEE82EE)
-	WHEAT = wx.Colour(0xB3DEF5)
-	WHITE = wx.Colour(0xFFFFFF)
-	WHITE_SMOKE = wx.Colour(0xF5F5F5)
-	YELLOW = wx.Colour(0x00FFFF)
-	YELLOW_GREEN = wx.Colour(0x32CD9A)
\ No newline at end of file
+	ALICE_BLUE = 0xF0F8FF
+	ANTIQUE_WHITE = 0xD7EBFA
+	AQUA = 0xFFFF00
+	AQUA_MARINE = 0xD4FF7F
+	AZURE = 0xFFFFF0
+	BEIGE = 0xDCF5F5
+	BISQUE = 0xC4E4FF
+	BLACK = 0x000000
+	BLANCHED_ALMOND = 0xCDEBFF
+	BLUE = 0xFF0000
+	BLUE_VIOLET = 0xE22B8A
+	BROWN = 0x2A2AA5
+	BURLY_WOOD = 0x87B8DE
+	CADET_BLUE = 0xA09E5F
+	CHARTREUSE = 0x00FF7F
+	CHOCOLATE = 0x1E69D2
+	CORAL = 0x507FFF
+	CORNFLOWER_BLUE = 0xED9564
+	CORNSILK = 0xDCF8FF
+	CRIMSON = 0x3C14DC
+	CYAN = 0xFFFF00
+	DARK_BLUE = 0x8B0000
+	DARK_CYAN = 0x8B8B00
+	DARK_GOLDENROD = 0x0B86B8
+	DARK_GRAY = 0xA9A9A9
+	DARK_GREY = 0xA9A9A9
+	DARK_GREEN = 0x006400
+	DARK_KHAKI = 0x6BB7BD
+	DARK_MAGENTA = 0x8B008B
+	DARK_OLIVE_GREEN = 0x2F6B55
+	DARK_ORANGE = 0x008CFF
+	DARK_ORCHID = 0xCC3299
+	DARK_RED = 0x00008B
+	DARK_SALMON = 0x7A96E9
+	DARK_SEA_GREEN = 0x8FBC8F
+	DARK_SLATE_BLUE = 0x8B3D48
+	DARK_SLATE_GRAY = 0x4F4F2F
+	DARK_SLATE_GREY = 0x4F4F2F
+	DARK_TURQUOISE = 0xD1CE00
+	DARK_VIOLET = 0xD30094
+	DEEP_PINK = 0x9314FF
+	DEEP_SKY_BLUE = 0xFFBF00
+	DIM_GRAY = 0x696969
+	DIM_GREY = 0x696969
+	DODGER_BLUE = 0xFF901E
+	FIRE_BRICK = 0x2222B2
+	FLORAL_WHITE = 0xF0FAFF
+	FOREST_GREEN = 0x228B22
+	FUCHSIA = 0xFF00FF
+	GAINSBORO = 0xDCDCDC
+	GHOST_WHITE = 0xFFF8F8
+	GOLD = 0x00D7FF
+	GOLDENROD = 0x20A5DA
+	GRAY = 0x808080
+	GREY = 0x808080
+	GREEN = 0x008000
+	GREEN_YELLOW = 0x2FFFAD
+	HONEYDEW = 0xF0FFF0
+	HOT_PINK = 0xBF69FF
+	INDIAN_RED = 0x5C5CCD
+	INDIGO = 0x82004B
+	IVORY = 0xF0FFFF
+	KHAKI = 0x8CE6F0
+	LAVENDER = 0xFAE6E6
+	LAVENDER_BLUSH = 0xF5F0FF
+	LAWN_GREEN = 0x00FC7C
+	LEMON_CHIFFON = 0xCDFAFF
+	LIGHT_BLUE = 0xE6D8AD
+	LIGHT_CORAL = 0x8080F0
+	LIGHT_CYAN = 0xFFFFE0
+	LIGHT_GOLDENROD_YELLOW = 0xD2FAFA
+	LIGHT_GRAY = 0xD3D3D3
+	LIGHT_GREY = 0xD3D3D3
+	LIGHT_GREEN = 0x90EE90
+	LIGHT_PINK = 0xC1B6FF
+	LIGHT_SALMON = 0x7AA0FF
+	LIGHT_SEA_GREEN = 0xAAB220
+	LIGHT_SKY_BLUE = 0xFACE87
+	LIGHT_SLATE_GRAY = 0x998877
+	LIGHT_SLATE_GREY = 0x998877
+	LIGHT_STEEL_BLUE = 0xDEC4B0
+	LIGHT_YELLOW = 0xE0FFFF
+	LIME = 0x00FF00
+	LIME_GREEN = 0x32CD32
+	LINEN = 0xE6F0FA
+	MAGENTA = 0xFF00FF
+	MAROON = 0x000080
+	MEDIUM_AQUA_MARINE = 0xAACD66
+	MEDIUM_BLUE = 0xCD0000
+	MEDIUM_ORCHID = 0xD355BA
+	MEDIUM_PURPLE = 0xDB7093
+	MEDIUM_SEA_GREEN = 0x71B33C
+	MEDIUM_SLATE_BLUE = 0xEE687B
+	MEDIUM_SPRING_GREEN = 0x9AFA00
+	MEDIUM_TURQUOISE = 0xCCD148
+	MEDIUM_VIOLET_RED = 0x8515C7
+	MIDNIGHT_BLUE = 0x701919
+	MINT_CREAM = 0xFAFFF5
+	MISTY_ROSE = 0xE1E4FF
+	MOCCASIN = 0xB5E4FF
+	NAVAJO_WHITE = 0xADDEFF
+	NAVY = 0x800000
+	OLD_LACE = 0xE6F5FD
+	OLIVE = 0x008080
+	OLIVE_DRAB = 0x238E6B
+	ORANGE = 0x00A5FF
+	ORANGE_RED = 0x0045FF
+	ORCHID = 0xD670DA
+	PALE_GOLDENROD = 0xAAE8EE
+	PALE_GREEN = 0x98FB98
+	PALE_TURQUOISE = 0xEEEEAF
+	PALE_VIOLET_RED = 0x9370DB
+	PAPAYA_WHIP = 0xD5EFFF
+	PEACH_PUFF = 0xB9DAFF
+	PERU = 0x3F85CD
+	PINK = 0xCBC0FF
+	PLUM = 0xDDA0DD
+	POWDER_BLUE = 0xE6E0B0
+	PURPLE = 0x800080
+	REBECCA_PURPLE = 0x993366
+	RED = 0x0000FF
+	ROSY_BROWN = 0x8F8FBC
+	ROYAL_BLUE = 0xE16941
+	SADDLE_BROWN = 0x13458B
+	SALMON = 0x7280FA
+	SANDY_BROWN = 0x60A4F4
+	SEA_GREEN = 0x578B2E
+	SEA_SHELL = 0xEEF5FF
+	SIENNA = 0x2D52A0
+	SILVER = 0xC0C0C0
+	SKY_BLUE = 0xEBCE87
+	SLATE_BLUE = 0xCD5A6A
+	SLATE_GRAY = 0x908070
+	SLATE_GREY = 0x908070
+	SNOW = 0xFAFAFF
+	SPRING_GREEN = 0x7FFF00
+	STEEL_BLUE = 0xB48246
+	TAN = 0x8CB4D2
+	TEAL = 0x808000
+	THISTLE = 0xD8BFD8
+	TOMATO = 0x4763FF
+	TURQUOISE = 0xD0E040
+	VIOLET = 0xEE82EE
+	WHEAT = 0xB3DEF5
+	WHITE = 0xFFFFFF
+	WHITE_SMOKE = 0xF5F5F5
+	YELLOW = 0x00FFFF
+	YELLOW_GREEN = 0x32CD9A
+
+# Packed colours are plain 0xBBGGRR integers, the Color values themselves.
+# The batch operations below take packed colours, Color members, or
+# sequences of packed colours (lists, arrays, or NumPy integer arrays) and
+# broadcast single values against sequences. NumPy arrays are worked on
+# as whole arrays and give a uint32 array back; any other sequence gives
+# an array('I').
+
+def add(a, b):
+
+	return batch(add_color, a, b)
+
+def add_color(a, b):
+
+	# Channel by channel, saturating at 255.
+
+	return pack_channels(
+		(a & 0xFF) + (b & 0xFF),
+		(a >> 8 & 0xFF) + (b >> 8 & 0xFF),
+		(a >> 16 & 0xFF) + (b >> 16 & 0xFF)
+	)
+
+def batch(function, *operands):
+
+	operands = [
+		operand.value if isinstance(operand, Color) else operand
+		for operand in operands
+	]
+
+	if any(hasattr(operand, 'dtype') for operand in operands):
+		operands = [
+			operand.astype('int64')
+			if hasattr(operand, 'dtype') and operand.dtype.kind in 'ui'
+			else operand
+			for operand in operands
+		]
+
+		return function(*operands).astype('uint32')
+
+	if all(isinstance(operand, (int, float)) for operand in operands):
+		return function(*operands)
+
+	return array('I', map(function, *[
+		repeat(operand) if isinstance(operand, (int, float)) else operand
+		for operand in operands
+	]))
+
+def clamp_channel(value):
+
+	if hasattr(value, 'clip'):
+		return value.clip(0, 255).astype('int64')
+
+	return min(max(int(value), 0), 255)
+
+def lerp(a, b, t):
+
+	# t is the weight of b, from 0 to 1.
+
+	return batch(lerp_color, a, b, t)
+
+def lerp_color(a, b, t):
+
+	# Red and blue are mixed together in one multiply, then green.
+
+	# t outside [0, 1] is clamped, since a weight below 0 or above 256
+	# would carry red into blue and back.
+
+	weight = t * 256
+	if hasattr(weight, 'clip'):
+		weight = weight.clip(0, 256).astype('int64')
+	else:
+		weight = min(max(int(weight), 0), 256)
+
+	rest = 256 - weight
+
+	return (
+		((a & 0xFF00FF) * rest + (b & 0xFF00FF) * weight >> 8) & 0xFF00FF
+		| ((a & 0x00FF00) * rest + (b & 0x00FF00) * weight >> 8) & 0x00FF00
+	)
+
+def multiply(a, b):
+
+	return batch(multiply_color, a, b)
+
+def multiply_color(a, b):
+
+	# Channel by channel, with 255 standing for 1.
+
+	return (
+		(a & 0xFF) * (b & 0xFF) // 255
+		| ((a >> 8 & 0xFF) * (b >> 8 & 0xFF) // 255) << 8
+		| ((a >> 16 & 0xFF) * (b >> 16 & 0xFF) // 255) << 16
+	)
+
+def pack_channels(red, green, blue):
+
+	return (
+		clamp_channel(red)
+		| clamp_channel(green) << 8
+		| clamp_channel(blue) << 16
+	)
+
+def pack_rgb(red, green, blue):
+
+	return red | green << 8 | blue << 16
+
+def scale(a, factor):
+
+	return batch(scale_color, a, factor)
+
+def scale_color(a, factor):
+
+	# Every channel times factor, saturating at 255.
+
+	return pack_channels(
+		(a & 0xFF) * factor,
+		(a >> 8 & 0xFF) * factor,
+		(a >> 16 & 0xFF) * factor
+	)
+
+def to_color(packed):
+
+	# The named Color for a packed colour, or None if it has no name.
+
+	return Color._value2member_map_.get(packed)
+
+def to_packed(color):
+
+	if isinstance(color, Color):
+		return color.value
+
+	return color
+
+def unpack_rgb(packed):
+
+	return packed & 0xFF, packed >> 8 & 0xFF, packed >> 16 & 0xFF
\ No newline at end of file
@@ -0,0 +1,643 @@
+from array import array
+
+from .color import Color, lerp_color, to_color
+from .text import compile_text
+
+class Console():
+
+    # Character cells and their colours, without any way of drawing them.
+    # Cells are stored column by column like a map Grid: the character
+    # code and the fg and bg colours packed as 0xBBGGRR integers. dirty
+    # flags the cells changed since the last composite, so a cell written
+    # several times in one frame is only drawn once, and dirty_rect is the
+    # bounding box in cells of everything changed since then.
+
+    def __init__(self, width=80, height=24):
+
+        self.default_bg_color = Color.BLACK
+        self.default_fg_color = Color.WHITE
+
+        self.grid_width = width
+        self.grid_height = height
+
+        cells = width * height
+
+        self.characters = array('B', [ord(' ')]) * cells
+        self.fg_colors = array('I', [Color.WHITE.value]) * cells
+        self.bg_colors = array('I', [Color.BLACK.value]) * cells
+        self.dirty = bytearray(cells)
+        self.dirty_count = 0
+        self.dirty_rect = None
+
+        # Where this console was last blitted and the part of it that
+        # landed on the target. blit_under holds the target cells as they
+        # were beneath it, and blit_shown what the blit left there, both
+        # laid out like this console's own cells.
+        self.blit_target = None
+        self.blit_origin = None
+        self.blit_area = None
+        self.blit_under = None
+        self.blit_shown = None
+
+    def blit(self, target, x=0, y=0, key_color=None, alpha=1.0):
+
+        # Copies this console onto target with its top left cell at (x, y),
+        # clipped to target. Cells whose bg is key_color let the target
+        # show through, and alpha below 1 blends over it. The target cells
+        # beneath are remembered, so only cells changed since the last blit
+        # are copied, cells turned transparent get back what was under
+        # them, and blends are always worked out from the cells beneath
+        # rather than the previous blend. Target cells drawn over since the
+        # last blit are taken as the new cells beneath. Moving to another
+        # origin on the same target puts back what was under the old one.
+
+        left = max(-x, 0)
+        top = max(-y, 0)
+        right = min(self.grid_width, target.grid_width - x) - 1
+        bottom = min(self.grid_height, target.grid_height - y) - 1
+
+        area = None
+        if left <= right and top <= bottom:
+            area = (left, top, right, bottom)
+
+        if self.blit_under is None:
+            cells = len(self.characters)
+            self.blit_under = (
+                array('B', [0]) * cells,
+                array('I', [0]) * cells,
+                array('I', [0]) * cells
+            )
+            self.blit_shown = (
+                array('B', [0]) * cells,
+                array('I', [0]) * cells,
+                array('I', [0]) * cells
+            )
+
+        if self.blit_target is not target or self.blit_origin != (x, y):
+            if self.blit_target is target and self.blit_area is not None:
+                self.restore_blit_under()
+
+            self.blit_target = target
+            self.blit_origin = (x, y)
+            self.blit_area = area
+
+            if area is not None:
+                self.copy_blit_under(target, x, y, area)
+
+            self.invalidate()
+        elif area is not None:
+            self.check_blit_under(target, x, y, area)
+
+        if area is None or self.dirty_rect is None:
+            self.clear_dirty()
+            self.dirty_rect = None
+            return
+
+        dirty_left, dirty_top, dirty_right, dirty_bottom = self.dirty_rect
+        dirty_left = max(dirty_left, left)
+        dirty_top = max(dirty_top, top)
+        dirty_right = min(dirty_right, right)
+        dirty_bottom = min(dirty_bottom, bottom)
+
+        if dirty_left <= dirty_right and dirty_top <= dirty_bottom:
+            if key_color is None and alpha >= 1:
+                self.blit_opaque(
+                    target,
+                    x,
+                    y,
+                    dirty_left,
+                    dirty_top,
+                    dirty_right,
+                    dirty_bottom
+                )
+            else:
+                if key_color is None:
+                    key = -1
+                else:
+                    key = self.pack_color(key_color)
+
+                self.blit_blended(
+                    target,
+                    x,
+                    y,
+                    dirty_left,
+                    dirty_top,
+                    dirty_right,
+                    dirty_bottom,
+                    key,
+                    alpha
+                )
+
+        self.clear_dirty()
+        self.dirty_rect = None
+
+    def blit_blended(
+        self,
+        target,
+        x,
+        y,
+        left,
+        top,
+        right,
+        bottom,
+        key,
+        alpha
+    ):
+
+        # Goes cell by cell over the changed cells only, working from the
+        # cells beneath. A space lets the character beneath show through,
+        # tinted towards the new bg.
+
+        characters = self.characters
+        fg_colors = self.fg_colors
+        bg_colors = self.bg_colors
+        dirty = self.dirty
+
+        under_characters, under_fgs, under_bgs = self.blit_under
+        shown_characters, shown_fgs, shown_bgs = self.blit_shown
+
+        height = self.grid_height
+        target_height = target.grid_height
+
+        for source_x in range(left, right + 1):
+            column = source_x * height
+            first = column + top
+            last = column + bottom + 1
+
+            i = dirty.find(1, first, last)
+            while i != -1:
+                code = characters[i]
+                fg = fg_colors[i]
+                bg = bg_colors[i]
+
+                under_code = under_characters[i]
+                under_fg = under_fgs[i]
+                under_bg = under_bgs[i]
+
+                if bg == key:
+                    code = under_code
+                    fg = under_fg
+                    bg = under_bg
+                elif alpha < 1:
+                    bg = lerp_color(under_bg, bg, alpha)
+
+                    if code == 32:
+                        code = under_code
+                        fg = lerp_color(under_fg, bg, alpha)
+                    elif code == under_code:
+                        fg = lerp_color(under_fg, fg, alpha)
+                    else:
+                        fg = lerp_color(under_bg, fg, alpha)
+
+                shown_characters[i] = code
+                shown_fgs[i] = fg
+                shown_bgs[i] = bg
+
+                target.put_cell(
+                    (source_x + x) * target_height + i - column + y,
+                    code,
+                    fg,
+                    bg
+                )
+
+                i = dirty.find(1, i + 1, last)
+
+    def blit_opaque(self, target, x, y, left, top, right, bottom):
+
+        # Copies the changed rectangle a column at a time.
+
+        height = self.grid_height
+        target_height = target.grid_height
+        shown_characters, shown_fgs, shown_bgs = self.blit_shown
+        changed = False
+
+        for source_x in range(left, right + 1):
+            start = source_x * height + top
+            end = source_x * height + bottom + 1
+
+            characters = self.characters[start:end]
+            fg_colors = self.fg_colors[start:end]
+            bg_colors = self.bg_colors[start:end]
+
+            shown_characters[start:end] = characters
+            shown_fgs[start:end] = fg_colors
+            shown_bgs[start:end] = bg_colors
+
+            if target.put_run(
+                (source_x + x) * target_height + top + y,
+                1,
+                characters,
+                fg_colors,
+                bg_colors
+            ):
+                changed = True
+
+        if changed:
+            target.extend_dirty_rect(
+                left + x,
+                top + y,
+                right + x,
+                bottom + y
+            )
+
+    def check_blit_under(self, target, x, y, area):
+
+        # Target cells that no longer hold what the last blit left there
+        # were drawn over from underneath: they become the new cells
+        # beneath, and the cells above them are copied again.
+
+        left, top, right, bottom = area
+        under_characters, under_fgs, under_bgs = self.blit_under
+        shown_characters, shown_fgs, shown_bgs = self.blit_shown
+        dirty = self.dirty
+
+        for source_x in range(left, right + 1):
+            start = source_x * self.grid_height + top
+            end = source_x * self.grid_height + bottom + 1
+            t = (source_x + x) * target.grid_height + top + y
+            u = t + end - start
+
+            if (
+                target.characters[t:u] == shown_characters[start:end]
+                and target.fg_colors[t:u] == shown_fgs[start:end]
+                and target.bg_colors[t:u] == shown_bgs[start:end]
+            ):
+                continue
+
+            first = -1
+            last = -1
+
+            for i in range(start, end):
+                j = t + i - start
+                code = target.characters[j]
+                fg = target.fg_colors[j]
+                bg = target.bg_colors[j]
+
+                if (
+                    code != shown_characters[i]
+                    or fg != shown_fgs[i]
+                    or bg != shown_bgs[i]
+                ):
+                    under_characters[i] = code
+                    under_fgs[i] = fg
+                    under_bgs[i] = bg
+
+                    if not dirty[i]:
+                        dirty[i] = 1
+                        self.dirty_count += 1
+
+                    if first == -1:
+                        first = i - start + top
+                    last = i - start + top
+
+            self.extend_dirty_rect(source_x, first, source_x, last)
+
+    def check_bounds(self, x, y):
+        if x < 0 or x >= self.grid_width:
+            raise ValueError(
+                'The value of x must be within [0, ' 
+                + str(self.grid_width - 1)
+                + ']'
+            )
+
+        if y < 0 or y >= self.grid_height:
+            raise ValueError(
+                'The value of y must be within [0, '
+                + str(self.grid_height - 1)
+                + ']'
+            )
+
+    def clear_dirty(self):
+
+        self.dirty[:] = bytes(len(self.dirty))
+        self.dirty_count = 0
+
+    def color_string_length(self, text):
+
+        return compile_text(text).length
+
+    def copy_blit_under(self, target, x, y, area):
+
+        # Takes the cells beneath a new blit position from the target.
+
+        left, top, right, bottom = area
+
+        for source_x in range(left, right + 1):
+            start = source_x * self.grid_height + top
+            end = source_x * self.grid_height + bottom + 1
+            t = (source_x + x) * target.grid_height + top + y
+            u = t + end - start
+
+            for cells in (self.blit_under, self.blit_shown):
+                cells[0][start:end] = target.characters[t:u]
+                cells[1][start:end] = target.fg_colors[t:u]
+                cells[2][start:end] = target.bg_colors[t:u]
+
+    def extend_dirty_rect(self, left, top, right, bottom):
+
+        if self.dirty_rect is None:
+            self.dirty_rect = [left, top, right, bottom]
+            return
+
+        dirty = self.dirty_rect
+        dirty[0] = min(dirty[0], left)
+        dirty[1] = min(dirty[1], top)
+        dirty[2] = max(dirty[2], right)
+        dirty[3] = max(dirty[3], bottom)
+
+    def invalidate(self):
+
+        # Marks every cell as changed so the next composite redraws it all.
+
+        self.dirty[:] = b'\x01' * len(self.dirty)
+        self.dirty_count = len(self.dirty)
+        self.dirty_rect = [0, 0, self.grid_width - 1, self.grid_height - 1]
+
+    def invalidate_rect(self, left, top, right, bottom):
+
+        # Marks the cells of an inclusive rectangle as changed, clipped to
+        # the console, so the next composite or blit copies them again.
+
+        left = max(left, 0)
+        top = max(top, 0)
+        right = min(right, self.grid_width - 1)
+        bottom = min(bottom, self.grid_height - 1)
+
+        if left > right or top > bottom:
+            return
+
+        dirty = self.dirty
+        for x in range(left, right + 1):
+            start = x * self.grid_height + top
+            end = x * self.grid_height + bottom + 1
+
+            self.dirty_count += end - start - dirty.count(1, start, end)
+            dirty[start:end] = b'\x01' * (end - start)
+
+        self.extend_dirty_rect(left, top, right, bottom)
+
+    def pack_color(self, color):
+
+        # Colours are either Color members or already packed integers.
+
+        if isinstance(color, int):
+            return color
+
+        return color.value
+
+    def process_color_string(self, text):
+
+        # The runs of a markup string as dicts of text, fg and bg, with the
+        # console defaults filled in. The parsing is done by compile_text.
+
+        stubs = []
+
+        for run_text, fg, bg in compile_text(text).runs:
+            stubs.append(
+                {
+                    'text': run_text,
+                    'fg': self.default_fg_color if fg == -1 else to_color(fg),
+                    'bg': self.default_bg_color if bg == -1 else to_color(bg)
+                }
+            )
+
+        return stubs
+
+    def put_array(self, grid, palette, x=0, y=0):
+
+        # Draws a whole map at (x, y). grid is indexed grid[x][y], like a
+        # generator's map, and palette maps each cell value to a
+        # (character, fg_color, bg_color) tuple, where either colour may be
+        # -1 for the display default. Clipping happens once for the whole
+        # grid and each visible column is translated and compared in bulk.
+
+        codes = dict()
+        fgs = dict()
+        bgs = dict()
+
+        for value, (character, fg_color, bg_color) in palette.items():
+            if fg_color == -1:
+                fg_color = self.default_fg_color
+
+            if bg_color == -1:
+                bg_color = self.default_bg_color
+
+            codes[value] = ord(character)
+            fgs[value] = self.pack_color(fg_color)
+            bgs[value] = self.pack_color(bg_color)
+
+        width = len(grid)
+        height = len(grid[0]) if width > 0 else 0
+
+        left = max(x, 0)
+        top = max(y, 0)
+        right = min(x + width, self.grid_width)
+        bottom = min(y + height, self.grid_height)
+
+        if left >= right or top >= bottom:
+            return
+
+        first = -1
+        last = -1
+
+        for column_x in range(left, right):
+            column = grid[column_x - x][top - y:bottom - y]
+
+            if not self.put_run(
+                column_x * self.grid_height + top,
+                1,
+                array('B', map(codes.__getitem__, column)),
+                array('I', map(fgs.__getitem__, column)),
+                array('I', map(bgs.__getitem__, column))
+            ):
+                continue
+
+            if first == -1:
+                first = column_x
+            last = column_x
+
+        if first != -1:
+            self.extend_dirty_rect(first, top, last, bottom - 1)
+
+    def put_character(self, character, x, y, fg_color=-1, bg_color=-1):
+
+        self.check_bounds(x, y)
+
+        if fg_color == -1:
+            fg_color = self.default_fg_color
+
+        if bg_color == -1:
+            bg_color = self.default_bg_color
+
+        self.put_cell(
+            x * self.grid_height + y,
+            ord(character),
+            self.pack_color(fg_color),
+            self.pack_color(bg_color)
+        )
+
+    def put_cell(self, i, code, fg, bg):
+
+        # Writes one cell by index with an already packed glyph and colours.
+
+        if (
+            self.characters[i] == code
+            and self.fg_colors[i] == fg
+            and self.bg_colors[i] == bg
+        ):
+            return
+
+        self.characters[i] = code
+        self.fg_colors[i] = fg
+        self.bg_colors[i] = bg
+
+        if self.dirty[i]:
+            return
+
+        self.dirty[i] = 1
+        self.dirty_count += 1
+
+        x, y = divmod(i, self.grid_height)
+
+        if self.dirty_rect is None:
+            self.dirty_rect = [x, y, x, y]
+        else:
+            dirty = self.dirty_rect
+            if x < dirty[0]:
+                dirty[0] = x
+            elif x > dirty[2]:
+                dirty[2] = x
+
+            if y < dirty[1]:
+                dirty[1] = y
+            elif y > dirty[3]:
+                dirty[3] = y
+
+    def put_row(self, x, y, codes, fg_colors, bg_colors):
+
+        # Writes a horizontal run of already packed cells from (x, y).
+
+        count = len(codes)
+
+        self.check_bounds(x, y)
+        self.check_bounds(x + count - 1, y)
+
+        if self.put_run(
+            x * self.grid_height + y,
+            self.grid_height,
+            codes,
+            fg_colors,
+            bg_colors
+        ):
+            self.extend_dirty_rect(x, y, x + count - 1, y)
+
+    def put_run(self, start, step, codes, fg_colors, bg_colors):
+
+        # Stores packed cells at start, start + step, ... and flags the ones
+        # that change. Columns are contiguous in the arrays and rows are
+        # strided, so either is compared and stored through one slice.
+        # Returns whether anything changed; the caller extends dirty_rect.
+
+        count = len(codes)
+        end = start + (count - 1) * step + 1
+
+        characters = self.characters
+        fgs = self.fg_colors
+        bgs = self.bg_colors
+        dirty = self.dirty
+
+        if (
+            characters[start:end:step] == codes
+            and fgs[start:end:step] == fg_colors
+            and bgs[start:end:step] == bg_colors
+        ):
+            return False
+
+        for k in range(count):
+            i = start + k * step
+            if (
+                not dirty[i]
+                and (
+                    characters[i] != codes[k]
+                    or fgs[i] != fg_colors[k]
+                    or bgs[i] != bg_colors[k]
+                )
+            ):
+                dirty[i] = 1
+                self.dirty_count += 1
+
+        characters[start:end:step] = codes
+        fgs[start:end:step] = fg_colors
+        bgs[start:end:step] = bg_colors
+
+        return True
+
+    def put_text(self, text, x, y, width=-1, height=-1):
+
+        # text is a markup string or a Text from compile_text. Each wrapped
+        # line is written with a single put_row.
+
+        if width == -1:
+            width = self.grid_width - x
+
+        if height == -1:
+            height = self.grid_height - y
+
+        if isinstance(text, str):
+            text = compile_text(text)
+
+        lines = text.layout(
+            width,
+            self.pack_color(self.default_fg_color),
+            self.pack_color(self.default_bg_color)
+        )
+
+        for dy in range(min(height, len(lines))):
+            codes, fg_colors, bg_colors = lines[dy]
+
+            if len(codes) > 0:
+                self.put_row(x, y + dy, codes, fg_colors, bg_colors)
+
+    def put_text_centered(self, text, y, x=0, width=-1):
+
+        if width == -1:
+            width = self.grid_width - x
+
+        if isinstance(text, str):
+            text = compile_text(text)
+
+        length = text.length
+        dx = (width - length) // 2
+
+        if dx < 0:
+            dx = 0
+
+        self.put_text(text, dx + x, y, length, 1)
+
+    def restore_blit_under(self):
+
+        # Puts back the cells beneath the last blit wherever the target
+        # still shows what that blit left there.
+
+        target = self.blit_target
+        x, y = self.blit_origin
+        left, top, right, bottom = self.blit_area
+        under_characters, under_fgs, under_bgs = self.blit_under
+        shown_characters, shown_fgs, shown_bgs = self.blit_shown
+
+        for source_x in range(left, right + 1):
+            for source_y in range(top, bottom + 1):
+                i = source_x * self.grid_height + source_y
+                j = (source_x + x) * target.grid_height + source_y + y
+
+                if (
+                    target.characters[j] == shown_characters[i]
+                    and target.fg_colors[j] == shown_fgs[i]
+                    and target.bg_colors[j] == shown_bgs[i]
+                ):
+                    target.put_cell(
+                        j,
+                        under_characters[i],
+                        under_fgs[i],
+                        under_bgs[i]
+                    )
\ No newline at end of file
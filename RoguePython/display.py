@@ -1,61 +1,36 @@
-import os
-import re
-import sys
+from time import perf_counter
 
 import wx
 
+from .atlas import GlyphAtlas, numpy
 from .color import Color
 from .font import Font
+from .glyphs import GlyphConsole, font_path, load_font_masks
+from .scheduler import FrameStats
 
 
-class Display():
+class Display(GlyphConsole):
 
-    def __init__(self, width=80, height=24, font=Font.ATI_8X14, title=''):
+    def __init__(
+        self,
+        width=80,
+        height=24,
+        font=Font.ATI_8X14,
+        title='',
+        glyph_cache_size=4096
+    ):
 
         self.app = wx.App()
 
-        self.default_bg_color = Color.BLACK
-        self.default_fg_color = Color.WHITE
+        super().__init__(width, height, glyph_cache_size)
 
-        self.grid_width = width
-        self.grid_height = height
-
-        self.color_regex = re.compile(r'%([bc])\{([^}]*)\}')
+        self.atlas = None
+        self.use_atlas = numpy is not None
 
         self.load_glyphs(font)
 
-        self.client_size = (width * self.font_width, height * self.font_height)
-
-        # Windows Version
-        buffer_image = wx.Image(self.client_size[0], self.client_size[1])
-        buffer_image.SetRGB(
-            wx.Rect(0, 0, self.client_size[0], self.client_size[1]),
-            0,
-            0,
-            0
-        )
-        self.buffer_bitmap = buffer_image.ConvertToBitmap()
+        self.create_buffer()
 
-        # Mac Version
-        # self.buffer_bitmap = wx.Bitmap.FromRGBA(
-        #     self.client_size[0], 
-        #     self.client_size[1]
-        # )
-
-        self.display_grid = [
-            [
-                {
-                    'x': x,
-                    'y': y,
-                    'character': ' ', 
-                    'fg_color': Color.WHITE, 
-                    'bg_color': Color.BLACK
-                } for y in range(height)
-            ] for x in range(width)
-        ]
-
-        self.updates = []
-        
         self.frame = wx.Frame()
         self.frame.Bind(wx.EVT_PAINT, self.paint)
 
@@ -67,111 +42,184 @@ class Display():
 
         self.frame.Centre()
 
-    def check_bounds(self, x, y):
-        if x < 0 or x >= self.grid_width:
-            raise ValueError(
-                'The value of x must be within [0, ' 
-                + str(self.grid_width - 1)
-                + ']'
+        # Fixed timestep scheduler. tick is called with the step length in
+        # seconds as many times as the elapsed time allows, then whatever
+        # it drew is composited and presented once.
+        self.tick = None
+        self.target_fps = 60
+        self.max_steps = 5
+        self.accumulator = 0
+        self.last_time = None
+
+        self.frame_stats = FrameStats(
+            ('update', 'composite', 'present'),
+            budget=1 / self.target_fps
+        )
+
+        self.timer = wx.Timer(self.frame)
+        self.frame.Bind(wx.EVT_TIMER, self.step, self.timer)
+        self.frame.Bind(wx.EVT_CLOSE, self.close)
+
+    def close(self, e):
+
+        self.timer.Stop()
+        e.Skip()
+
+    def composite(self):
+
+        if self.dirty_count == 0:
+            return
+
+        if self.use_atlas:
+            left, top, right, bottom = self.dirty_rect
+
+            self.atlas.composite(
+                self,
+                self.frame_view,
+                left,
+                top,
+                right,
+                bottom
             )
 
-        if y < 0 or y >= self.grid_height:
-            raise ValueError(
-                'The value of y must be within [0, '
-                + str(self.grid_height - 1)
-                + ']'
+            self.clear_dirty()
+            self.buffer_bitmap.CopyFromBuffer(
+                self.frame_pixels,
+                wx.BitmapBufferFormat_RGB
             )
 
-    def color_string_length(self, text):
-        length = len(text)
+            return
 
-        for m in self.color_regex.finditer(text):
-            length -= m.end() - m.start()
+        dc = wx.MemoryDC()
+        dc.SelectObject(self.buffer_bitmap)
 
-        return length
+        dirty = self.dirty
+        characters = self.characters
+        fg_colors = self.fg_colors
+        bg_colors = self.bg_colors
 
-    def get_glyph(self, character, fg_color, bg_color):
+        i = dirty.find(1)
+        while i != -1:
+            x, y = divmod(i, self.grid_height)
+            glyph = self.glyph(characters[i], fg_colors[i], bg_colors[i])
 
-        index = ord(character)
+            dc.DrawBitmap(glyph, x * self.font_width, y * self.font_height)
 
-        key = str(fg_color) + character + str(bg_color)
+            dirty[i] = 0
+            i = dirty.find(1, i + 1)
 
-        if not key in self.glyph_dictionary:
-            mask = wx.Mask(self.glyph_images[index], Color.BLACK.value)
+        dc.SelectObject(wx.NullBitmap)
 
-            fg_image = wx.Image(self.font_width, self.font_height)
-            fg_image.SetRGB(
-                wx.Rect(0, 0, self.font_width, self.font_height),
-                fg_color.value.Red(),
-                fg_color.value.Green(),
-                fg_color.value.Blue()
-            )
+        self.dirty_count = 0
+
+    def create_buffer(self):
+
+        self.client_size = (
+            self.grid_width * self.font_width,
+            self.grid_height * self.font_height
+        )
+
+        # Windows Version
+        buffer_image = wx.Image(self.client_size[0], self.client_size[1])
+        buffer_image.SetRGB(
+            wx.Rect(0, 0, self.client_size[0], self.client_size[1]),
+            0,
+            0,
+            0
+        )
+        self.buffer_bitmap = buffer_image.ConvertToBitmap()
 
-            fg_bitmap = fg_image.ConvertToBitmap()
-            fg_bitmap.SetMask(mask)
+        # RGB copy of the buffer used by the atlas path, which composites
+        # here and uploads the whole frame to buffer_bitmap in one call.
+        self.frame_pixels = bytearray(
+            self.client_size[0] * self.client_size[1] * 3
+        )
 
-            bitmap = wx.Bitmap(self.font_width, self.font_height)
+        self.frame_view = None
+        if numpy is not None:
+            self.frame_view = numpy.frombuffer(
+                self.frame_pixels,
+                dtype=numpy.uint8
+            ).reshape(self.client_size[1], self.client_size[0], 3)
 
-            dc = wx.MemoryDC(bitmap)
-            dc.SetBackground(wx.Brush(bg_color.value))
-            dc.Clear()
+        # Mac Version
+        # self.buffer_bitmap = wx.Bitmap.FromRGBA(
+        #     self.client_size[0], 
+        #     self.client_size[1]
+        # )
 
-            dc.DrawBitmap(fg_bitmap, 0, 0, useMask=True)
-            dc.SelectObject(wx.NullBitmap)
+    def create_glyph(self, index, fg_color, bg_color):
 
-            self.glyph_dictionary[key] = bitmap
+        # fg_color and bg_color are packed 0xBBGGRR integers
 
-        return self.glyph_dictionary[key]
+        black = wx.Colour(Color.BLACK.value)
+        mask = wx.Mask(self.glyph_image(index), black)
 
-    def load_glyphs(self, font):
+        fg_image = wx.Image(self.font_width, self.font_height)
+        fg_image.SetRGB(
+            wx.Rect(0, 0, self.font_width, self.font_height),
+            fg_color & 0xFF,
+            (fg_color >> 8) & 0xFF,
+            (fg_color >> 16) & 0xFF
+        )
 
-        font_file = os.path.join(
-            os.path.dirname(sys.modules['RoguePython.display'].__file__),
-            font.value['file'])
+        fg_bitmap = fg_image.ConvertToBitmap()
+        fg_bitmap.SetMask(mask)
 
-        glyph_matrix = wx.Bitmap()
-        glyph_matrix.LoadFile(font_file)
+        bitmap = wx.Bitmap(self.font_width, self.font_height)
 
-        self.glyph_dictionary = dict()
+        dc = wx.MemoryDC(bitmap)
+        dc.SetBackground(wx.Brush(wx.Colour(bg_color)))
+        dc.Clear()
 
-        self.font_width = glyph_matrix.GetWidth() // 16
-        self.font_height = glyph_matrix.GetHeight() // 16
+        dc.DrawBitmap(fg_bitmap, 0, 0, useMask=True)
+        dc.SelectObject(wx.NullBitmap)
 
-        self.glyph_images = []
+        return bitmap
 
-        for i in range(256):
-            area = wx.Rect(
-                (i % 16) * self.font_width,
-                (i // 16) * self.font_height,
-                self.font_width,
-                self.font_height
-            )
+    def get_frame_stats(self):
 
-            image = glyph_matrix.GetSubBitmap(area)
+        return self.frame_stats.summary()
 
-            self.glyph_images.append(image)
+    def glyph_image(self, index):
 
-    def paint(self, e):
+        # Glyphs are cut from the font sheet the first time they are used.
 
-        dc = wx.MemoryDC()
-        dc.SelectObject(self.buffer_bitmap)
+        image = self.glyph_images[index]
 
-        for i in range(len(self.updates)):
-            glyph = self.get_glyph(
-                self.updates[i]['character'], 
-                self.updates[i]['fg_color'], 
-                self.updates[i]['bg_color']
+        if image is None:
+            image = self.glyph_matrix.GetSubBitmap(
+                wx.Rect(
+                    (index % 16) * self.font_width,
+                    (index // 16) * self.font_height,
+                    self.font_width,
+                    self.font_height
+                )
             )
 
-            dc.DrawBitmap(
-                glyph, 
-                self.updates[i]['x'] * self.font_width, 
-                self.updates[i]['y'] * self.font_height
-            )
+            self.glyph_images[index] = image
 
-        dc.SelectObject(wx.NullBitmap)
+        return image
+
+    def load_glyphs(self, font):
+
+        self.glyph_matrix = wx.Bitmap()
+        self.glyph_matrix.LoadFile(font_path(font))
+
+        self.glyph_cache.clear()
+
+        self.font = font
+        self.font_width = self.glyph_matrix.GetWidth() // 16
+        self.font_height = self.glyph_matrix.GetHeight() // 16
+
+        self.glyph_images = [None] * 256
 
-        self.updates.clear()
+        if numpy is not None:
+            self.atlas = GlyphAtlas(*load_font_masks(font))
+
+    def paint(self, e):
+
+        self.composite()
 
         # Mac Version
         # paint_dc = wx.AutoBufferedPaintDC(self.frame)
@@ -180,131 +228,124 @@ class Display():
         paint_dc = wx.PaintDC(self.frame)
         paint_dc.DrawBitmap(self.buffer_bitmap, 0, 0)
 
-    def process_color_string(self, text):
-        
-        current_fg = self.default_fg_color
-        current_bg = self.default_bg_color
-        text_index = 0
-        stubs = []
-
-        for m in self.color_regex.finditer(text):
-            text_stub = text[text_index:m.start()]
-            stubs.append(
-                {
-                    'text': text_stub, 
-                    'fg': current_fg, 
-                    'bg': current_bg
-                }
-            )
+    def present(self):
+
+        if self.dirty_rect is None:
+            return
+
+        self.composite()
 
-            if m.group(1) == 'b':
-                if len(m.group(2)) == 0:
-                    current_bg = self.default_bg_color
-                else:
-                    current_bg = Color[m.group(2)]
-            else:
-                if len(m.group(2)) == 0:
-                    current_fg = self.default_fg_color
-                else:
-                    current_fg = Color[m.group(2)]
-
-            text_index = m.end()
-
-        text_stub = text[text_index:]
-        stubs.append(
-            {
-                'text': text_stub,
-                'fg': current_fg,
-                'bg': current_bg
-            }
+        left, top, right, bottom = self.dirty_rect
+        self.dirty_rect = None
+
+        self.frame.RefreshRect(
+            wx.Rect(
+                left * self.font_width,
+                top * self.font_height,
+                (right - left + 1) * self.font_width,
+                (bottom - top + 1) * self.font_height
+            ),
+            eraseBackground=False
         )
 
-        return stubs
+    def set_font(self, font):
 
-    def put_character(self, character, x, y, fg_color=-1, bg_color=-1):
+        # Switches fonts in place. The window is resized to fit and every
+        # cell redrawn with the new glyphs; the console contents stay.
 
-        self.check_bounds(x, y)
+        if font == self.font:
+            return
 
-        if fg_color == -1:
-            fg_color = self.default_fg_color
+        self.load_glyphs(font)
+        self.create_buffer()
 
-        if bg_color == -1:
-            bg_color = self.default_bg_color
+        self.frame.SetClientSize(self.client_size)
+        self.invalidate()
+        self.frame.Refresh(eraseBackground=False)
 
-        update = {
-            'x': x,
-            'y': y,
-            'character': character,
-            'fg_color': fg_color,
-            'bg_color': bg_color
-        }
+    def set_max_steps(self, max_steps):
 
-        if self.display_grid[x][y] != update:
-            self.updates.append(update)
-            self.display_grid[x][y] = update
+        self.max_steps = max(1, max_steps)
 
-    def put_text(self, text, x, y, width=-1, height=-1):
+    def set_target_fps(self, fps):
 
-        if width == -1:
-            width = self.grid_width - x
+        self.target_fps = fps
+        self.frame_stats.set_budget(1 / fps)
 
-        if height == -1:
-            height = self.grid_height - y
+        if self.timer.IsRunning():
+            self.timer.Start(self.timer_interval())
 
-        dx = 0
-        dy = 0
+    def set_tick(self, tick):
 
-        text_data = self.process_color_string(text)
+        self.tick = tick
 
-        for i in range(len(text_data)):
-            data = text_data[i]
-            words = data['text'].split(' ')
+    def set_use_atlas(self, use_atlas):
 
-            for j in range(len(words)):
-                if dx + len(words[j]) + (0 if j == 0 else 1) > width:
-                    dx = 0
-                    dy += 1
-                    if dy == height:
-                        return
+        # The two paths draw into different buffers, so switching redraws
+        # every cell.
 
-                if j > 0 and dx > 0:
-                    self.put_character(
-                        ' ', 
-                        dx + x, 
-                        dy + y, 
-                        data['fg'], 
-                        data['bg']
-                    )
+        self.use_atlas = use_atlas and self.atlas is not None
+        self.invalidate()
 
-                    dx += 1
+    def start(self):
 
-                if len(words[j]) > 0:
-                    for k in range(len(words[j])):
-                        self.put_character(
-                            words[j][k],
-                            dx + x,
-                            dy + y,
-                            data['fg'],
-                            data['bg']
-                        )
+        self.frame.Show(True)
 
-                        dx += 1
+        if self.tick is not None:
+            self.last_time = perf_counter()
+            self.accumulator = 0
+            self.timer.Start(self.timer_interval())
 
-    def put_text_centered(self, text, y, x=0, width=-1):
+        self.app.MainLoop()
 
-        if width == -1:
-            width = self.grid_width - x
+    def step(self, e=None):
 
-        length = self.color_string_length(text)
-        dx = (width - length) // 2
+        now = perf_counter()
+        if self.last_time is None:
+            self.last_time = now
 
-        if dx < 0:
-            dx = 0
+        delta = 1 / self.target_fps
+        self.accumulator += now - self.last_time
+        self.last_time = now
 
-        self.put_text(text, dx + x, y, length, 1)
+        steps = 0
+        while self.accumulator >= delta and steps < self.max_steps:
+            self.tick(delta)
+            self.accumulator -= delta
+            steps += 1
 
-    def start(self):
+        # After a long stall drop the backlog instead of trying to catch
+        # up on it, which would only make the next frame later still.
+        if steps == self.max_steps:
+            self.accumulator = 0
 
-        self.frame.Show(True)
-        self.app.MainLoop()
+        if steps == 0:
+            return
+
+        updated = perf_counter()
+        composited = updated
+        presented = updated
+
+        # Nothing changed, so there is nothing to composite or repaint.
+        if self.dirty_rect is not None:
+            self.composite()
+            composited = perf_counter()
+            self.present()
+
+            # Paint now rather than on a later EVT_PAINT, so the blit to
+            # the screen is counted in the present stage.
+            self.frame.Update()
+            presented = perf_counter()
+
+        self.frame_stats.record({
+            'update': updated - now,
+            'composite': composited - updated,
+            'present': presented - composited
+        })
+
+    def timer_interval(self):
+
+        # wx timers only fire in whole milliseconds and tend to run late, so
+        # they poll faster than the step; the accumulator keeps the pace.
+        return max(1, int(500 / self.target_fps))
 
@@ -0,0 +1,156 @@
+import os
+from collections import OrderedDict
+
+from .console import Console
+from .png import read_png
+
+class GlyphCache():
+
+    # Least recently used cache of rendered glyphs keyed by
+    # (glyph index, packed fg, packed bg). create is called with those
+    # three values on a miss.
+
+    def __init__(self, create, size=4096):
+
+        self.create = create
+        self.size = size
+        self.glyphs = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def clear(self):
+
+        self.glyphs.clear()
+
+    def get(self, index, fg_color, bg_color):
+
+        key = (index, fg_color, bg_color)
+        glyph = self.glyphs.get(key)
+
+        if glyph is not None:
+            self.hits += 1
+            self.glyphs.move_to_end(key)
+            return glyph
+
+        self.misses += 1
+
+        glyph = self.create(index, fg_color, bg_color)
+        self.glyphs[key] = glyph
+
+        while len(self.glyphs) > self.size:
+            self.glyphs.popitem(last=False)
+            self.evictions += 1
+
+        return glyph
+
+    def set_size(self, size):
+
+        self.size = size
+
+        while len(self.glyphs) > self.size:
+            self.glyphs.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.glyphs),
+            'limit': self.size
+        }
+
+class GlyphConsole(Console):
+
+    # A console that draws its cells with glyphs from a font sheet.
+    # Subclasses provide create_glyph(index, fg_color, bg_color), taking
+    # packed colours, and the glyphs it returns are cached here.
+
+    def __init__(self, width=80, height=24, glyph_cache_size=4096):
+
+        super().__init__(width, height)
+
+        self.glyph_cache = GlyphCache(self.create_glyph, glyph_cache_size)
+
+    def get_glyph(self, character, fg_color, bg_color):
+
+        return self.glyph(
+            ord(character),
+            self.pack_color(fg_color),
+            self.pack_color(bg_color)
+        )
+
+    def get_glyph_cache_stats(self):
+
+        return self.glyph_cache.stats()
+
+    def glyph(self, index, fg_color, bg_color):
+
+        return self.glyph_cache.get(index, fg_color, bg_color)
+
+    def prewarm_glyphs(self, characters, colors):
+
+        # colors is an iterable of (fg_color, bg_color) pairs
+
+        for fg_color, bg_color in colors:
+            for character in characters:
+                self.get_glyph(character, fg_color, bg_color)
+
+    def set_glyph_cache_size(self, size):
+
+        self.glyph_cache.set_size(size)
+
+# Decoded glyph masks by Font, shared by every display in the process.
+font_masks = dict()
+
+def decode_font_masks(font):
+
+    width, height, samples, pixels = read_png(font_path(font))
+
+    font_width = width // 16
+    font_height = height // 16
+    color_samples = min(samples, 3)
+
+    opaque = bytearray(width * height)
+    for i in range(width * height):
+        start = i * samples
+        if any(pixels[start:start + color_samples]):
+            opaque[i] = 1
+
+    masks = []
+
+    for i in range(256):
+        left = (i % 16) * font_width
+        top = (i // 16) * font_height
+
+        masks.append([
+            bytes(opaque[
+                (top + row) * width + left:
+                (top + row) * width + left + font_width
+            ])
+            for row in range(font_height)
+        ])
+
+    return font_width, font_height, masks
+
+def font_path(font):
+
+    return os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        font.value['file']
+    )
+
+def load_font_masks(font):
+
+    # Returns (font_width, font_height, masks). masks[i] holds one bytes
+    # object per pixel row of glyph i, with 1 wherever the sheet is not
+    # black, the same pixels wx.Mask treats as opaque. Sheets are decoded
+    # once per process and shared, so the result must not be modified.
+
+    if font not in font_masks:
+        font_masks[font] = decode_font_masks(font)
+
+    return font_masks[font]
@@ -0,0 +1,158 @@
+from .atlas import GlyphAtlas, numpy
+from .font import Font
+from .glyphs import GlyphConsole, load_font_masks
+from .png import write_png
+
+class HeadlessDisplay(GlyphConsole):
+
+    # Renders the console into an in-memory RGB buffer instead of a window,
+    # using the same glyph sheets as Display, so frames can be produced on
+    # machines without wx or a display.
+
+    def __init__(
+        self,
+        width=80,
+        height=24,
+        font=Font.ATI_8X14,
+        glyph_cache_size=4096
+    ):
+
+        super().__init__(width, height, glyph_cache_size)
+
+        self.atlas = None
+        self.use_atlas = numpy is not None
+
+        self.load_glyphs(font)
+        self.create_buffer()
+
+    def as_numpy(self):
+
+        if numpy is None:
+            raise ImportError(
+                'NumPy is required for HeadlessDisplay.as_numpy()'
+            )
+
+        return numpy.frombuffer(self.pixels, dtype=numpy.uint8).reshape(
+            self.pixel_height,
+            self.pixel_width,
+            3
+        )
+
+    def composite(self):
+
+        if self.dirty_count == 0:
+            return
+
+        # Large, dense updates are composited as one block through the
+        # atlas. Small or scattered ones go glyph by glyph, so two far
+        # apart cells do not redraw everything between them.
+
+        if self.use_atlas:
+            left, top, right, bottom = self.dirty_rect
+            area = (right - left + 1) * (bottom - top + 1)
+
+            if self.dirty_count >= 64 and self.dirty_count * 4 >= area:
+                self.atlas.composite(
+                    self,
+                    self.as_numpy(),
+                    left,
+                    top,
+                    right,
+                    bottom
+                )
+
+                self.clear_dirty()
+                return
+
+        dirty = self.dirty
+        characters = self.characters
+        fg_colors = self.fg_colors
+        bg_colors = self.bg_colors
+        pixels = self.pixels
+
+        stride = self.pixel_width * 3
+        glyph_stride = self.font_width * 3
+
+        i = dirty.find(1)
+        while i != -1:
+            x, y = divmod(i, self.grid_height)
+            rows = self.glyph(characters[i], fg_colors[i], bg_colors[i])
+
+            start = y * self.font_height * stride + x * glyph_stride
+            for row in rows:
+                pixels[start:start + glyph_stride] = row
+                start += stride
+
+            dirty[i] = 0
+            i = dirty.find(1, i + 1)
+
+        self.dirty_count = 0
+
+    def create_buffer(self):
+
+        self.pixel_width = self.grid_width * self.font_width
+        self.pixel_height = self.grid_height * self.font_height
+        self.pixels = bytearray(self.pixel_width * self.pixel_height * 3)
+
+    def create_glyph(self, index, fg_color, bg_color):
+
+        # A glyph is one RGB bytes object per pixel row.
+
+        fg = bytes((
+            fg_color & 0xFF,
+            (fg_color >> 8) & 0xFF,
+            (fg_color >> 16) & 0xFF
+        ))
+
+        bg = bytes((
+            bg_color & 0xFF,
+            (bg_color >> 8) & 0xFF,
+            (bg_color >> 16) & 0xFF
+        ))
+
+        return [
+            b''.join(fg if opaque else bg for opaque in row)
+            for row in self.glyph_masks[index]
+        ]
+
+    def load_glyphs(self, font):
+
+        self.font = font
+        self.font_width, self.font_height, self.glyph_masks = (
+            load_font_masks(font)
+        )
+
+        if numpy is not None:
+            self.atlas = GlyphAtlas(
+                self.font_width,
+                self.font_height,
+                self.glyph_masks
+            )
+
+        self.glyph_cache.clear()
+
+    def present(self):
+
+        self.composite()
+        self.dirty_rect = None
+
+    def set_font(self, font):
+
+        # The frame is resized to the new font and every cell redrawn; the
+        # console contents stay.
+
+        if font == self.font:
+            return
+
+        self.load_glyphs(font)
+        self.create_buffer()
+        self.invalidate()
+
+    def set_use_atlas(self, use_atlas):
+
+        self.use_atlas = use_atlas and self.atlas is not None
+
+    def save_png(self, path):
+
+        self.composite()
+        write_png(path, self.pixel_width, self.pixel_height, self.pixels)
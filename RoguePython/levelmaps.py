@@ -1,5 +1,6 @@
 from .maps.bspmap import BSPMapGenerator
 from .maps.cellular import CellularGenerator
+from .maps.grid import Grid
 from .maps.gridmap import GridGenerator
 
 BSPMap = BSPMapGenerator
@@ -46,21 +46,7 @@ class BSPMapGenerator(Map):
 
     def carve_map(self):
 
-        for i in range(len(self.spaces)):
-            left = self.spaces[i].room.position.x
-            top = self.spaces[i].room.position.y
-            width = self.spaces[i].room.width
-            height = self.spaces[i].room.height
-
-            self.carve(left, top, width, height)
-
-        for i in range(len(self.halls)): 
-            left = self.halls[i].position.x
-            top = self.halls[i].position.y
-            width = self.halls[i].width
-            height = self.halls[i].height
-
-            self.carve(left, top, width, height)
+        self.carve_rects([space.room for space in self.spaces] + self.halls)
 
     def connect_rooms(self):
         nodes = self.tree_branches(self.tree)
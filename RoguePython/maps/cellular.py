@@ -1,7 +1,9 @@
-from collections import deque
+from time import perf_counter
 
 from .map import Map
-from .geometry import Point
+from .geometry import Point, distance_sq
+from .grid import Grid, load_numpy
+from .regions import label_runs
 
 class CellularGenerator(Map):
 
@@ -17,6 +19,20 @@ class CellularGenerator(Map):
         self.min_floor_percentage = 0.4
         self.max_floor_percentage = 0.6
 
+        # None until the first smooth(), which checks for NumPy then.
+        self.use_numpy = None
+
+        self.early_rejection_limits = None
+        self.repair_regions = False
+        self.min_repair_region_size = 20
+
+        self.attempts = 0
+        self.early_rejections = 0
+        self.rejections = 0
+        self.repairs = 0
+        self.rejected_time = 0
+        self.generation_time = 0
+
     def set_live_cell_chance(self, chance):
 
         self.live_cell_chance = chance
@@ -45,6 +61,37 @@ class CellularGenerator(Map):
 
         self.max_floor_percentage = percentage
 
+    def set_use_numpy(self, use_numpy):
+
+        self.use_numpy = use_numpy and load_numpy() is not None
+
+    def set_early_rejection_limits(self, lower, upper):
+
+        # Floor percentage range a map must be in once the empty space
+        # filling passes are done; anything outside it is discarded
+        # before the wall passes and region search run.
+
+        self.early_rejection_limits = (lower, upper)
+
+    def set_repair_regions(self, repair):
+
+        self.repair_regions = repair
+
+    def set_min_repair_region_size(self, size):
+
+        self.min_repair_region_size = size
+
+    def get_stats(self):
+
+        return {
+            'attempts': self.attempts,
+            'early_rejections': self.early_rejections,
+            'rejections': self.rejections,
+            'repairs': self.repairs,
+            'rejected_time': self.rejected_time,
+            'generation_time': self.generation_time
+        }
+
     def extended_walls(self, x, y):
 
         walls = 0
@@ -62,82 +109,279 @@ class CellularGenerator(Map):
 
     def find_main_region(self):
 
-        region = 1
+        runs, sizes = label_runs(self.map, -1)
         largest_region = 0
         largest_size = -1
 
-        for x in range(1, self.width - 1):
-            for y in range(1, self.height - 1):
-                if self.map[x][y] == -1:
-                    size = self.set_region(x, y, region)
+        for region in range(1, len(sizes)):
+            if sizes[region] > largest_size:
+                largest_size = sizes[region]
+                largest_region = region
 
-                    if size > largest_size:
-                        largest_size = size
-                        largest_region = region
+        floor_percentage = largest_size / (self.width * self.height)
+        if floor_percentage > self.max_floor_percentage:
+            return False
 
-                    region += 1
+        if floor_percentage < self.min_floor_percentage:
+            if self.repair_regions:
+                return self.join_regions(runs, sizes, largest_region)
 
-        floor_percentage = largest_size / (self.width * self.height)
-        if (
-            floor_percentage < self.min_floor_percentage
-            or floor_percentage > self.max_floor_percentage
-        ):
             return False
 
-        for x in range(1, self.width - 1):
-            for y in range(1, self.height - 1):
-                self.map[x][y] = 1 if self.map[x][y] == largest_region else 0
+        self.carve(1, 1, self.width - 2, self.height - 2, 0)
+
+        for x, top, bottom, region in runs:
+            if region == largest_region:
+                self.carve(x, top, 1, bottom - top)
 
         return True
 
+    def floor_percentage(self):
+
+        return self.map.data.count(-1) / (self.width * self.height)
+
     def generate(self):
-        
+
+        self.attempts = 0
+        self.early_rejections = 0
+        self.rejections = 0
+        self.repairs = 0
+        self.rejected_time = 0
+
+        start = perf_counter()
         done = False
 
         while not done:
+            attempt_start = perf_counter()
+            self.attempts += 1
+
             self.randomize()
-            self.smooth()
-            done = self.find_main_region()
+
+            if self.early_rejection_limits is not None:
+                self.smooth(self.fill_empty_space_iterations, 0)
+
+                lower, upper = self.early_rejection_limits
+                floor_percentage = self.floor_percentage()
+
+                if floor_percentage < lower or floor_percentage > upper:
+                    self.early_rejections += 1
+                    self.rejected_time += perf_counter() - attempt_start
+                    continue
+
+                self.smooth(0, self.add_wall_iterations)
+            else:
+                self.smooth()
+
+            # The largest region can never hold more floor than the whole
+            # map, so maps that are already too sparse skip labelling.
+
+            if self.floor_percentage() < self.min_floor_percentage:
+                done = self.repair_regions and self.find_main_region()
+            else:
+                done = self.find_main_region()
+
+            if not done:
+                self.rejections += 1
+                self.rejected_time += perf_counter() - attempt_start
+
+        self.generation_time = perf_counter() - start
 
         return self.map
 
+    def join_regions(self, runs, sizes, main_region):
+
+        # Adds the next largest regions until the floor target is met, then
+        # links each one to the closest region already joined with an
+        # L-shaped tunnel between their most central cells.
+
+        total = self.width * self.height
+        order = sorted(range(1, len(sizes)), key=lambda r: -sizes[r])
+        selected = [main_region]
+        size = sizes[main_region]
+
+        for region in order:
+            if size / total >= self.min_floor_percentage:
+                break
+
+            if sizes[region] < self.min_repair_region_size:
+                break
+
+            if region != main_region:
+                selected.append(region)
+                size += sizes[region]
+
+        if size / total < self.min_floor_percentage:
+            return False
+
+        centers = self.region_centers(runs, selected)
+
+        self.carve(1, 1, self.width - 2, self.height - 2, 0)
+
+        chosen = set(selected)
+        for x, top, bottom, region in runs:
+            if region in chosen:
+                self.carve(x, top, 1, bottom - top)
+
+        joined = [centers[main_region]]
+
+        for region in selected[1:]:
+            a = centers[region]
+            b = min(joined, key=lambda p: distance_sq(a, p))
+
+            self.carve(min(a.x, b.x), a.y, abs(a.x - b.x) + 1, 1)
+            self.carve(b.x, min(a.y, b.y), 1, abs(a.y - b.y) + 1)
+
+            joined.append(a)
+
+        floor_percentage = self.map.data.count(1) / total
+        if floor_percentage > self.max_floor_percentage:
+            return False
+
+        self.repairs += 1
+        return True
+
     def randomize(self):
 
+        values = self.rng.random_batch((self.width - 2) * (self.height - 2))
+        i = 0
+
         for x in range(1, self.width - 1):
+            column = self.map[x]
             for y in range(1, self.height - 1):
-                self.map[x][y] = (
-                    -1 if self.rng.random() < self.live_cell_chance else 0
-                )
+                column[y] = -1 if values[i] < self.live_cell_chance else 0
+                i += 1
+
+    def region_centers(self, runs, regions):
+
+        totals = dict((region, [0, 0, 0]) for region in regions)
+
+        for x, top, bottom, region in runs:
+            if region in totals:
+                length = bottom - top
+                totals[region][0] += x * length
+                totals[region][1] += (top + bottom - 1) * length / 2
+                totals[region][2] += length
+
+        centroids = dict(
+            (
+                region,
+                Point(total[0] / total[2], total[1] / total[2])
+            )
+            for region, total in totals.items()
+        )
+
+        centers = dict()
+        nearest = dict()
+
+        for x, top, bottom, region in runs:
+            if region in centroids:
+                c = centroids[region]
+                y = min(max(int(round(c.y)), top), bottom - 1)
+                p = Point(x, y)
+                d = distance_sq(p, c)
+
+                if region not in centers or d < nearest[region]:
+                    centers[region] = p
+                    nearest[region] = d
+
+        return centers
+
+    def smooth(self, floor_fill=-1, wall_fill=-1):
+
+        if floor_fill == -1:
+            floor_fill = self.fill_empty_space_iterations
+
+        if wall_fill == -1:
+            wall_fill = self.add_wall_iterations
 
-    def set_region(self, x, y, region):
+        if self.use_numpy is None:
+            self.use_numpy = load_numpy() is not None
 
-        size = 1
-        floor_cells = deque([Point(x, y)])
+        if self.use_numpy:
+            self.smooth_numpy(floor_fill, wall_fill)
+        else:
+            self.smooth_python(floor_fill, wall_fill)
 
-        self.map[x][y] = region
+    def smooth_numpy(self, floor_fill, wall_fill):
 
-        while len(floor_cells) > 0:
-            cell = floor_cells.popleft()
+        # Same rules as smooth_python(), including the y - x bound checked
+        # by extended_walls(), computed with shifted slices over the whole
+        # interior and two buffers that are swapped between iterations.
 
-            for i in range(len(self.directions)):
-                dir = self.directions[i]
-                if self.map[cell.x + dir.x][cell.y + dir.y] == -1:
-                    floor_cells.append(Point(cell.x + dir.x, cell.y + dir.y))
-                    self.map[cell.x + dir.x][cell.y + dir.y] = region
-                    size += 1
+        numpy = load_numpy()
 
-        return size
+        w = self.width
+        h = self.height
+
+        if w < 3 or h < 3:
+            return
+
+        source = self.map
+        buffers = [
+            Grid(w, h, 0, self.typecode),
+            Grid(w, h, 0, self.typecode)
+        ]
+
+        is_wall = numpy.empty((w, h), dtype=numpy.bool_)
+        walls = numpy.empty((w - 2, h - 2), dtype=numpy.uint8)
+        extended = numpy.empty((w - 2, h - 2), dtype=numpy.uint8)
+        rock = numpy.empty((w - 2, h - 2), dtype=numpy.bool_)
+
+        x = numpy.arange(1, w - 1).reshape(-1, 1)
+        y = numpy.arange(1, h - 1).reshape(1, -1)
+        upper_check = y - x >= 0
+        upper_rows = (numpy.arange(1, h - 1) - 2) % h
+
+        neighbours = [
+            (a, b)
+            for a in range(3)
+            for b in range(3)
+            if not (a == 1 and b == 1)
+        ]
+
+        while floor_fill + wall_fill > 0:
+            target = buffers[0] if source is not buffers[0] else buffers[1]
+
+            cells = source.as_numpy()
+            numpy.equal(cells, 0, out=is_wall)
+            wall_cells = is_wall.view(numpy.uint8)
+
+            walls.fill(0)
+            for a, b in neighbours:
+                walls += wall_cells[a:a + w - 2, b:b + h - 2]
+
+            interior = target.as_numpy()[1:w - 1, 1:h - 1]
+            interior.fill(-1)
+
+            if floor_fill > 0:
+                extended.fill(0)
+                extended[1:, :] += wall_cells[0:w - 3, 1:h - 1]
+                extended[:-1, :] += wall_cells[3:w, 1:h - 1]
+                extended += (
+                    wall_cells[1:w - 1][:, upper_rows] & upper_check
+                )
+                extended[:, :-1] += wall_cells[1:w - 1, 3:h]
+                extended += walls
+
+                numpy.less_equal(extended, self.wall_lower_limit, out=rock)
+                numpy.copyto(interior, 0, where=rock)
+
+            numpy.greater_equal(walls, self.wall_upper_limit, out=rock)
+            numpy.copyto(interior, 0, where=rock)
+
+            source = target
+
+            if floor_fill > 0:
+                floor_fill -= 1
+            else:
+                wall_fill -= 1
 
-    def smooth(self):
+        self.map = source
 
-        floor_fill = self.fill_empty_space_iterations
-        wall_fill = self.add_wall_iterations
+    def smooth_python(self, floor_fill, wall_fill):
 
         while floor_fill + wall_fill > 0:
-            new_map = [
-                [0 for y in range(self.height)] 
-                for x in range(self.width)
-            ]
+            new_map = Grid(self.width, self.height, 0, self.typecode)
 
             for x in range(1, self.width - 1):
                 for y in range(1, self.height - 1):
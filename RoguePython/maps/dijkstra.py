@@ -0,0 +1,294 @@
+from array import array
+
+# Multi-source distance fields ("Dijkstra maps") over Grid cells. Every
+# passable cell holds its distance to the nearest goal and the direction
+# of the step that leads towards it, so any number of agents can follow
+# the field with one lookup each. Costs are the same as PathFinder: 1 per
+# step with 4-way movement, 10 and 14 with 8-way movement, and no
+# diagonal steps past the corner of a wall.
+
+unreached = 0x7FFFFFFF
+
+class DistanceField():
+
+    # Cells are expanded from a bucket queue, one bucket per distance,
+    # since costs are small integers. Each cell also remembers which goal
+    # it was reached from, so removing a goal only has to clear and refill
+    # the area that goal was closest to instead of the whole map.
+
+    def __init__(self, grid, diagonal=False, wall=0):
+
+        self.grid = grid
+        self.diagonal = diagonal
+        self.wall = wall
+
+        height = grid.height
+
+        if diagonal:
+            steps = [
+                (-1, 0, 10),
+                (1, 0, 10),
+                (0, -1, 10),
+                (0, 1, 10),
+                (-1, -1, 14),
+                (1, -1, 14),
+                (-1, 1, 14),
+                (1, 1, 14)
+            ]
+        else:
+            steps = [(-1, 0, 1), (1, 0, 1), (0, -1, 1), (0, 1, 1)]
+
+        self.steps = [
+            (dx * height + dy, dx, dy, cost)
+            for dx, dy, cost in steps
+        ]
+
+        cells = grid.width * height
+
+        self.distance = array('i', [unreached]) * cells
+        self.owner = array('i', [-1]) * cells
+        self.flow = array('b', [-1]) * cells
+
+        self.goals = dict()
+        self.next_goal = 0
+        self.version = grid.version
+
+    def add_goals(self, goals):
+
+        # Distances can only shrink, so the new goals are spread from
+        # without touching anything else.
+
+        if self.version != self.grid.version:
+            self.set_goals(list(self.goals.keys()) + list(goals))
+            return
+
+        self.propagate(self.seed_goals(goals))
+
+    def get_distance(self, x, y):
+
+        # The distance to the nearest goal, or None if none is reachable.
+
+        distance = self.distance[x * self.grid.height + y]
+
+        if distance == unreached:
+            return None
+
+        return distance
+
+    def next_step(self, x, y):
+
+        # The neighbouring cell to move to from (x, y), or None on a goal or
+        # where no goal can be reached.
+
+        direction = self.flow[x * self.grid.height + y]
+
+        if direction == -1:
+            return None
+
+        offset, dx, dy, cost = self.steps[direction]
+
+        return x + dx, y + dy
+
+    def propagate(self, buckets):
+
+        # buckets maps a distance to the cells queued at it. Cells can be
+        # queued more than once; stale entries are skipped.
+
+        grid = self.grid
+        width = grid.width
+        height = grid.height
+        data = grid.data
+        wall = self.wall
+        distance = self.distance
+        owner = self.owner
+        flow = self.flow
+
+        steps = [
+            (offset, dx, dy, cost, self.reverse(direction))
+            for direction, (offset, dx, dy, cost) in enumerate(self.steps)
+        ]
+
+        if len(buckets) == 0:
+            return
+
+        current_distance = min(buckets.keys())
+
+        while len(buckets) > 0:
+            bucket = buckets.pop(current_distance, None)
+
+            if bucket is None:
+                current_distance += 1
+                continue
+
+            for current in bucket:
+                if distance[current] != current_distance:
+                    continue
+
+                x, y = divmod(current, height)
+                edge = x == 0 or y == 0 or x == width - 1 or y == height - 1
+                current_owner = owner[current]
+
+                for offset, dx, dy, cost, back in steps:
+                    if edge and not (
+                        0 <= x + dx < width and 0 <= y + dy < height
+                    ):
+                        continue
+
+                    neighbour = current + offset
+
+                    if data[neighbour] == wall:
+                        continue
+
+                    new_distance = current_distance + cost
+
+                    if new_distance >= distance[neighbour]:
+                        continue
+
+                    if dx != 0 and dy != 0 and (
+                        data[current + dx * height] == wall
+                        or data[current + dy] == wall
+                    ):
+                        continue
+
+                    distance[neighbour] = new_distance
+                    owner[neighbour] = current_owner
+                    flow[neighbour] = back
+
+                    if new_distance in buckets:
+                        buckets[new_distance].append(neighbour)
+                    else:
+                        buckets[new_distance] = [neighbour]
+
+            current_distance += 1
+
+    def remove_goals(self, goals):
+
+        # Clears the area closest to each removed goal, then refills it from
+        # the cells around its edge, which still hold correct distances to
+        # the remaining goals.
+
+        if self.version != self.grid.version:
+            removed = set(goals)
+            self.set_goals([g for g in self.goals if g not in removed])
+            return
+
+        height = self.grid.height
+        width = self.grid.width
+        distance = self.distance
+        owner = self.owner
+        flow = self.flow
+
+        cleared = []
+
+        for goal in goals:
+            if goal not in self.goals:
+                continue
+
+            label = self.goals.pop(goal)
+            start = goal[0] * height + goal[1]
+
+            if owner[start] != label:
+                continue
+
+            owner[start] = -1
+            stack = [start]
+
+            while len(stack) > 0:
+                current = stack.pop()
+                cleared.append(current)
+
+                distance[current] = unreached
+                flow[current] = -1
+
+                x, y = divmod(current, height)
+
+                for offset, dx, dy, cost in self.steps:
+                    if not (0 <= x + dx < width and 0 <= y + dy < height):
+                        continue
+
+                    neighbour = current + offset
+
+                    if owner[neighbour] == label:
+                        owner[neighbour] = -1
+                        stack.append(neighbour)
+
+        buckets = dict()
+        edges = set()
+
+        for current in cleared:
+            x, y = divmod(current, height)
+
+            for offset, dx, dy, cost in self.steps:
+                if not (0 <= x + dx < width and 0 <= y + dy < height):
+                    continue
+
+                neighbour = current + offset
+
+                if owner[neighbour] != -1 and neighbour not in edges:
+                    edges.add(neighbour)
+                    buckets.setdefault(distance[neighbour], []).append(
+                        neighbour
+                    )
+
+        self.propagate(buckets)
+
+    def reverse(self, direction):
+
+        # The index of the step going the opposite way.
+
+        offset, dx, dy, cost = self.steps[direction]
+
+        for i, (o, x, y, c) in enumerate(self.steps):
+            if x == -dx and y == -dy:
+                return i
+
+    def seed_goals(self, goals):
+
+        height = self.grid.height
+        data = self.grid.data
+        buckets = {0: []}
+
+        for x, y in goals:
+            if not (0 <= x < self.grid.width and 0 <= y < height):
+                raise ValueError(
+                    'Goals must be within the map, not at ' + str((x, y))
+                )
+
+            i = x * height + y
+
+            if data[i] == self.wall or (x, y) in self.goals:
+                continue
+
+            self.goals[(x, y)] = self.next_goal
+            self.distance[i] = 0
+            self.owner[i] = self.next_goal
+            self.flow[i] = -1
+            self.next_goal += 1
+
+            buckets[0].append(i)
+
+        return buckets
+
+    def set_goals(self, goals):
+
+        # Recomputes the whole field from scratch. Goals on walls are
+        # ignored.
+
+        cells = len(self.distance)
+
+        self.distance[:] = array('i', [unreached]) * cells
+        self.owner[:] = array('i', [-1]) * cells
+        self.flow[:] = array('b', [-1]) * cells
+
+        self.goals = dict()
+        self.version = self.grid.version
+
+        self.propagate(self.seed_goals(goals))
+
+    def update_goals(self, removed, added):
+
+        # For goals that moved a few cells: only the areas the removed
+        # goals were closest to are recomputed.
+
+        self.remove_goals(removed)
+        self.add_goals(added)
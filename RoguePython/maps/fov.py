@@ -0,0 +1,185 @@
+# Field of view by recursive shadowcasting over a Grid. Each octant is
+# scanned row by row outward from the viewer, and walls split the visible
+# arc into narrower arcs that are scanned recursively, so only cells that
+# can actually be seen are visited.
+
+# Multipliers mapping octant coordinates (dx, dy) back onto the grid.
+octants = [
+    (1, 0, 0, 1),
+    (0, 1, 1, 0),
+    (0, -1, 1, 0),
+    (-1, 0, 0, 1),
+    (-1, 0, 0, -1),
+    (0, -1, -1, 0),
+    (0, 1, -1, 0),
+    (1, 0, 0, -1)
+]
+
+class FieldOfView():
+
+    # Cells equal to wall block sight; everything else is transparent.
+    # Walls are read straight from the grid, so carving into the map
+    # needs no refresh. visible is a scratch buffer the size of the map,
+    # reused by every call and cleared again after each viewer.
+
+    def __init__(self, grid, wall=0):
+
+        self.grid = grid
+        self.wall = wall
+        self.visible = bytearray(grid.width * grid.height)
+
+    def cast(self, x, y, row, start, end, radius, xx, xy, yx, yy):
+
+        data = self.grid.data
+        visible = self.visible
+        wall = self.wall
+        width = self.grid.width
+        height = self.grid.height
+        radius_sq = radius * radius
+        new_start = start
+
+        for distance in range(row, radius + 1):
+            dy = -distance
+            blocked = False
+
+            for dx in range(-distance, 1):
+                left_slope = (dx - 0.5) / (dy + 0.5)
+                right_slope = (dx + 0.5) / (dy - 0.5)
+
+                if start < right_slope:
+                    continue
+
+                if end > left_slope:
+                    break
+
+                cell_x = x + dx * xx + dy * xy
+                cell_y = y + dx * yx + dy * yy
+
+                if 0 <= cell_x < width and 0 <= cell_y < height:
+                    i = cell_x * height + cell_y
+                    opaque = data[i] == wall
+
+                    if dx * dx + dy * dy <= radius_sq:
+                        visible[i] = 1
+                else:
+                    opaque = True
+
+                if blocked:
+                    if opaque:
+                        new_start = right_slope
+                    else:
+                        blocked = False
+                        start = new_start
+                elif opaque and distance < radius:
+                    blocked = True
+                    self.cast(
+                        x,
+                        y,
+                        distance + 1,
+                        start,
+                        left_slope,
+                        radius,
+                        xx,
+                        xy,
+                        yx,
+                        yy
+                    )
+                    new_start = right_slope
+
+            if blocked:
+                break
+
+    def compute(self, x, y, radius):
+
+        # Returns the Visibility of a viewer at (x, y) seeing radius cells.
+
+        if not (0 <= x < self.grid.width and 0 <= y < self.grid.height):
+            raise ValueError(
+                'The viewer must be within the map, not at '
+                + str((x, y))
+            )
+
+        left = max(x - radius, 0)
+        top = max(y - radius, 0)
+        right = min(x + radius + 1, self.grid.width)
+        bottom = min(y + radius + 1, self.grid.height)
+
+        height = self.grid.height
+        visible = self.visible
+        visible[x * height + y] = 1
+
+        for xx, xy, yx, yy in octants:
+            self.cast(x, y, 1, 1.0, 0.0, radius, xx, xy, yx, yy)
+
+        # Only the window around the viewer can have been marked, so only
+        # that is copied out and cleared again.
+
+        columns = []
+        blank = bytes(bottom - top)
+
+        for column_x in range(left, right):
+            start = column_x * height + top
+            end = column_x * height + bottom
+
+            columns.append(visible[start:end])
+            visible[start:end] = blank
+
+        return Visibility(
+            left,
+            top,
+            right - left,
+            bottom - top,
+            b''.join(columns)
+        )
+
+    def compute_many(self, viewers, radius):
+
+        # viewers is a sequence of (x, y) pairs. Viewers standing on the
+        # same cell share one computation and one Visibility.
+
+        results = dict()
+
+        for viewer in viewers:
+            if viewer not in results:
+                results[viewer] = self.compute(viewer[0], viewer[1], radius)
+
+        return [results[viewer] for viewer in viewers]
+
+class Visibility():
+
+    # The cells one viewer can see, as a window of the map holding one
+    # byte per cell, column by column like a Grid: 1 if visible.
+
+    def __init__(self, left, top, width, height, mask):
+
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.mask = mask
+
+    def cells(self):
+
+        cells = []
+        i = self.mask.find(1)
+
+        while i != -1:
+            x, y = divmod(i, self.height)
+            cells.append((x + self.left, y + self.top))
+            i = self.mask.find(1, i + 1)
+
+        return cells
+
+    def count(self):
+
+        return self.mask.count(1)
+
+    def is_visible(self, x, y):
+
+        x -= self.left
+        y -= self.top
+
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return False
+
+        return self.mask[x * self.height + y] == 1
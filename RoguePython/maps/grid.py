@@ -0,0 +1,162 @@
+from array import array
+
+# NumPy is optional and slow to import, so it is only imported the first
+# time something asks for it through load_numpy().
+numpy = None
+numpy_checked = False
+
+def load_numpy():
+
+    global numpy, numpy_checked
+
+    if not numpy_checked:
+        numpy_checked = True
+
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+
+        numpy = module
+
+    return numpy
+
+class Grid():
+
+    # Cells are stored column by column in a flat array, so grid[x] is a
+    # zero-copy view of one column and grid[x][y] works like the old
+    # list-of-lists maps.
+
+    def __init__(self, width=0, height=0, value=0, typecode='b'):
+
+        self.width = width
+        self.height = height
+        self.typecode = typecode
+
+        # Counts changes made through the methods below, so anything
+        # derived from the cells (such as cached paths) can tell when it is
+        # stale. Writes straight into data are not counted.
+        self.version = 0
+
+        self.set_data(array(typecode, [value]) * (width * height))
+
+    def __getitem__(self, x):
+
+        return self.columns[x]
+
+    def __getstate__(self):
+
+        return (self.width, self.height, self.typecode, self.data.tobytes())
+
+    def __iter__(self):
+
+        return iter(self.columns)
+
+    def __len__(self):
+
+        return self.width
+
+    def __setstate__(self, state):
+
+        self.width, self.height, self.typecode, data = state
+        self.version = 0
+        self.set_data(array(self.typecode, data))
+
+    def as_numpy(self):
+
+        numpy = load_numpy()
+
+        if numpy is None:
+            raise ImportError('NumPy is required for Grid.as_numpy()')
+
+        return numpy.frombuffer(self.data, dtype=self.typecode).reshape(
+            self.width,
+            self.height
+        )
+
+    def column(self, x):
+
+        return self.columns[x]
+
+    def copy(self):
+
+        grid = Grid(self.width, self.height, 0, self.typecode)
+        grid.data[:] = self.data
+
+        return grid
+
+    def fill(self, value):
+
+        self.version += 1
+        self.data[:] = array(self.typecode, [value]) * len(self.data)
+
+    def fill_border(self, value):
+
+        if self.width == 0 or self.height == 0:
+            return
+
+        self.version += 1
+
+        row = array(self.typecode, [value]) * self.width
+        self.data[0::self.height] = row
+        self.data[self.height - 1::self.height] = row
+
+        self.fill_rect(0, 0, 1, self.height, value)
+        self.fill_rect(self.width - 1, 0, 1, self.height, value)
+
+    def fill_rect(self, left, top, width, height, value):
+
+        right = min(left + width, self.width)
+        bottom = min(top + height, self.height)
+        left = max(left, 0)
+        top = max(top, 0)
+
+        if left >= right or top >= bottom:
+            return
+
+        self.version += 1
+
+        values = array(self.typecode, [value]) * (bottom - top)
+        start = left * self.height
+
+        for x in range(left, right):
+            self.data[start + top:start + bottom] = values
+            start += self.height
+
+    def get(self, x, y):
+
+        return self.data[x * self.height + y]
+
+    def index(self, x, y):
+
+        return x * self.height + y
+
+    def row(self, y):
+
+        return self.view[y::self.height]
+
+    def set(self, x, y, value):
+
+        self.version += 1
+        self.data[x * self.height + y] = value
+
+    def set_data(self, data):
+
+        if len(data) != self.width * self.height:
+            raise ValueError(
+                'The data must contain '
+                + str(self.width * self.height)
+                + ' cells'
+            )
+
+        self.version += 1
+        self.data = data
+        self.view = memoryview(data)
+        self.columns = [
+            self.view[x * self.height:(x + 1) * self.height]
+            for x in range(self.width)
+        ]
+
+    def to_lists(self):
+
+        return [list(column) for column in self.columns]
@@ -59,21 +59,8 @@ class GridGenerator(Map):
 
     def carve_map(self):
 
-        for i in range(len(self.rooms)):
-            r = self.rooms[i]
-            self.carve(r.position.x, r.position.y, r.width, r.height)
-
-        for i in range(len(self.halls)):
-            r = self.halls[i]
-            self.carve(r.position.x, r.position.y, r.width, r.height)
-
-        for x in range(self.width):
-            self.map[x][0] = 0
-            self.map[x][self.height - 1] = 0
-
-        for y in range(self.height):
-            self.map[0][y] = 0
-            self.map[self.width - 1][y] = 0
+        self.carve_rects(self.rooms + self.halls)
+        self.map.fill_border(0)
 
     def create_halls(self):
 
@@ -88,7 +75,6 @@ class GridGenerator(Map):
 
     def gabriel_graph(self):
         self.edges = self.create_gabriel_graph(self.rooms)
-        print(len(self.edges))
 
     def generate(self):
         self.place_rooms()
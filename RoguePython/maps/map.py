@@ -1,13 +1,21 @@
 from ..rng import RNG
-from .geometry import Point, Rectangle, Edge, distance_sq, midpoint
+from .dijkstra import DistanceField
+from .fov import FieldOfView
+from .geometry import Point, Rectangle, Edge
+from .grid import Grid
+from .pathfinding import PathFinder
+from .regions import label_regions
+from .triangulation import gabriel_edges
 
 class Map():
 
+    typecode = 'b'
+
     def __init__(self, width=0, height=0, rng=0):
 
         self.width = width
         self.height = height
-        self.map = [[0 for y in range(height)] for x in range(width)]
+        self.map = Grid(width, height, 0, self.typecode)
 
         self.rng = rng
         if self.rng == 0:
@@ -38,6 +46,10 @@ class Map():
 
         self.rng = rng
 
+    def get_region_sizes(self, value=1):
+
+        return self.label_regions(value)[1]
+
     def get_width(self):
 
         return self.width
@@ -50,35 +62,38 @@ class Map():
 
     def carve(self, left, top, width, height, value=1):
 
-        for x in range(left, left + width):
-            for y in range(top, top + height):
-                self.map[x][y] = value
+        self.map.fill_rect(left, top, width, height, value)
 
-    def create_gabriel_graph(self, rooms):
+    def carve_rects(self, rectangles, value=1):
+
+        for r in rectangles:
+            self.map.fill_rect(
+                r.position.x,
+                r.position.y,
+                r.width,
+                r.height,
+                value
+            )
+
+    def create_distance_field(self, goals, diagonal=False, wall=0):
 
-        edges = []
+        field = DistanceField(self.map, diagonal, wall)
+        field.set_goals(goals)
 
-        for a in range(len(rooms) - 1):
-            roomA = rooms[a]
-            for b in range(a + 1, len(rooms)):
-                roomB = rooms[b]
-                mp = midpoint(roomA.center(), roomB.center())
-                radius_sq = distance_sq(roomA.center(), mp)
-                skip_edge = False
+        return field
 
-                for c in range(len(rooms)):
-                    if c == a or c == b:
-                        continue
+    def create_field_of_view(self, wall=0):
 
-                    roomC = rooms[c]
-                    if distance_sq(mp, roomC.center()) <= radius_sq:
-                        skip_edge = True
-                        break
+        return FieldOfView(self.map, wall)
 
-                if not skip_edge:
-                    edges.append(Edge(roomA, roomB))
+    def create_gabriel_graph(self, rooms):
+
+        centers = [room.center() for room in rooms]
 
-        return edges
+        return [
+            Edge(rooms[a], rooms[b])
+            for a, b in gabriel_edges(centers)
+        ]
 
     def create_hall(self, room1, room2, width):
 
@@ -147,3 +162,11 @@ class Map():
             )
 
         return [hh, hv]
+
+    def create_path_finder(self, diagonal=False, wall=0, cache_size=256):
+
+        return PathFinder(self.map, diagonal, wall, cache_size)
+
+    def label_regions(self, value=1):
+
+        return label_regions(self.map, value)
\ No newline at end of file
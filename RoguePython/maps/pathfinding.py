@@ -0,0 +1,228 @@
+import heapq
+from array import array
+from collections import OrderedDict
+
+# A* over Grid cells. Cells equal to wall are impassable. With 4-way
+# movement every step costs 1, and neighbours are tried in the order of
+# Map.directions. With 8-way movement straight steps cost 10 and diagonal
+# ones 14, and a diagonal step may not cut the corner of a wall.
+
+class PathFinder():
+
+    # The per-cell arrays are allocated once and reused by every search.
+    # Each search stamps the cells it touches with its own number, so
+    # nothing needs clearing between searches. Found paths are kept in a
+    # least recently used cache, which is emptied whenever the grid's
+    # version shows it has been carved or filled since.
+
+    def __init__(self, grid, diagonal=False, wall=0, cache_size=256):
+
+        self.grid = grid
+        self.diagonal = diagonal
+        self.wall = wall
+        self.cache_size = cache_size
+
+        cells = grid.width * grid.height
+
+        self.cost = array('i', [0]) * cells
+        self.parent = array('i', [0]) * cells
+        self.seen = array('I', [0]) * cells
+        self.closed = array('I', [0]) * cells
+        self.search = 0
+
+        self.cache = OrderedDict()
+        self.cache_version = grid.version
+
+        self.hits = 0
+        self.misses = 0
+
+    def clear_cache(self):
+
+        self.cache.clear()
+        self.cache_version = self.grid.version
+
+    def find_path(self, start, goal):
+
+        # start and goal are (x, y) pairs. Returns the path from start to
+        # goal inclusive as a tuple of (x, y) pairs, or None if goal
+        # cannot be reached. Returned paths are shared with the cache.
+
+        if self.cache_version != self.grid.version:
+            self.clear_cache()
+
+        key = (start, goal)
+
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.misses += 1
+
+        path = self.search_path(start, goal)
+
+        self.cache[key] = path
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return path
+
+    def get_cache_stats(self):
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.cache),
+            'limit': self.cache_size
+        }
+
+    def next_search(self):
+
+        self.search += 1
+
+        if self.search == 0xFFFFFFFF:
+            self.seen[:] = array('I', [0]) * len(self.seen)
+            self.closed[:] = array('I', [0]) * len(self.closed)
+            self.search = 1
+
+        return self.search
+
+    def search_path(self, start, goal):
+
+        grid = self.grid
+        width = grid.width
+        height = grid.height
+        data = grid.data
+        wall = self.wall
+        diagonal = self.diagonal
+
+        start_x, start_y = start
+        goal_x, goal_y = goal
+
+        for x, y in (start, goal):
+            if not (0 <= x < width and 0 <= y < height):
+                raise ValueError(
+                    'Path ends must be within the map, not at '
+                    + str((x, y))
+                )
+
+        begin = start_x * height + start_y
+        end = goal_x * height + goal_y
+
+        if data[begin] == wall or data[end] == wall:
+            return None
+
+        cells = width * height
+        cost = self.cost
+        parent = self.parent
+        seen = self.seen
+        closed = self.closed
+        stamp = self.next_search()
+
+        if diagonal:
+            steps = [
+                (-1, 0, 10),
+                (1, 0, 10),
+                (0, -1, 10),
+                (0, 1, 10),
+                (-1, -1, 14),
+                (1, -1, 14),
+                (-1, 1, 14),
+                (1, 1, 14)
+            ]
+        else:
+            steps = [(-1, 0, 1), (1, 0, 1), (0, -1, 1), (0, 1, 1)]
+
+        steps = [
+            (dx * height + dy, dx, dy, step)
+            for dx, dy, step in steps
+        ]
+
+        # Open entries are single ints, which the heap compares faster than
+        # tuples: lowest f first, then the highest cost so far, so among
+        # equally good cells the search keeps going deeper instead of
+        # widening across open rooms, then the cell index.
+
+        limit = cells * 14 + 1
+        order = limit * cells
+
+        seen[begin] = stamp
+        cost[begin] = 0
+        parent[begin] = -1
+        heap = [begin]
+
+        while len(heap) > 0:
+            current = heapq.heappop(heap) % cells
+
+            if closed[current] == stamp:
+                continue
+
+            if current == end:
+                break
+
+            closed[current] = stamp
+            x, y = divmod(current, height)
+            current_cost = cost[current]
+            edge = x == 0 or y == 0 or x == width - 1 or y == height - 1
+
+            for offset, dx, dy, step in steps:
+                if edge and not (0 <= x + dx < width and 0 <= y + dy < height):
+                    continue
+
+                neighbour = current + offset
+
+                if data[neighbour] == wall or closed[neighbour] == stamp:
+                    continue
+
+                if dx != 0 and dy != 0 and (
+                    data[current + dx * height] == wall
+                    or data[current + dy] == wall
+                ):
+                    continue
+
+                new_cost = current_cost + step
+
+                if seen[neighbour] == stamp and cost[neighbour] <= new_cost:
+                    continue
+
+                seen[neighbour] = stamp
+                cost[neighbour] = new_cost
+                parent[neighbour] = current
+
+                distance_x = abs(goal_x - x - dx)
+                distance_y = abs(goal_y - y - dy)
+
+                if diagonal:
+                    if distance_x > distance_y:
+                        estimate = 10 * distance_x + 4 * distance_y
+                    else:
+                        estimate = 10 * distance_y + 4 * distance_x
+                else:
+                    estimate = distance_x + distance_y
+
+                heapq.heappush(
+                    heap,
+                    (new_cost + estimate) * order
+                    + (limit - new_cost) * cells
+                    + neighbour
+                )
+        else:
+            return None
+
+        path = []
+        current = end
+
+        while current != -1:
+            path.append(divmod(current, height))
+            current = parent[current]
+
+        path.reverse()
+
+        return tuple(path)
+
+    def set_cache_size(self, size):
+
+        self.cache_size = size
+
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
@@ -0,0 +1,130 @@
+import re
+from array import array
+
+from .grid import Grid
+
+# Connected-component labelling over Grid cells, using 4-connectivity to
+# match Map.directions. Each column is split into runs of matching cells,
+# runs that touch a run in the previous column are merged with union-find,
+# and the results are numbered in the order a column-by-column scan first
+# reaches each region.
+
+def column_runs(grid, x, value, pattern=None):
+
+    start = x * grid.height
+    end = start + grid.height
+
+    if pattern is not None:
+        return [
+            (m.start() - start, m.end() - start)
+            for m in pattern.finditer(grid.view, start, end)
+        ]
+
+    runs = []
+    top = -1
+
+    for y in range(grid.height):
+        if grid.data[start + y] == value:
+            if top == -1:
+                top = y
+        elif top != -1:
+            runs.append((top, y))
+            top = -1
+
+    if top != -1:
+        runs.append((top, grid.height))
+
+    return runs
+
+def find_root(parent, label):
+
+    while parent[label] != label:
+        parent[label] = parent[parent[label]]
+        label = parent[label]
+
+    return label
+
+def label_runs(grid, value):
+
+    pattern = run_pattern(grid, value)
+    parent = []
+    runs = []
+    previous = []
+
+    for x in range(grid.width):
+        current = []
+
+        for top, bottom in column_runs(grid, x, value, pattern):
+            label = len(parent)
+            parent.append(label)
+            current.append((top, bottom, label))
+            runs.append((x, top, bottom, label))
+
+        i = 0
+        j = 0
+
+        while i < len(previous) and j < len(current):
+            p_top, p_bottom, p_label = previous[i]
+            c_top, c_bottom, c_label = current[j]
+
+            if p_top < c_bottom and c_top < p_bottom:
+                a = find_root(parent, p_label)
+                b = find_root(parent, c_label)
+
+                if a < b:
+                    parent[b] = a
+                elif b < a:
+                    parent[a] = b
+
+            if p_bottom < c_bottom:
+                i += 1
+            else:
+                j += 1
+
+        previous = current
+
+    # Roots are always the smallest provisional label in their region, so
+    # numbering roots in order keeps regions in scan order.
+
+    labels = [0 for i in range(len(parent))]
+    sizes = [0]
+
+    for label in range(len(parent)):
+        root = find_root(parent, label)
+
+        if root == label:
+            labels[label] = len(sizes)
+            sizes.append(0)
+        else:
+            labels[label] = labels[root]
+
+    resolved = []
+
+    for x, top, bottom, label in runs:
+        region = labels[label]
+        sizes[region] += bottom - top
+        resolved.append((x, top, bottom, region))
+
+    return resolved, sizes
+
+def label_regions(grid, value):
+
+    runs, sizes = label_runs(grid, value)
+    labels = Grid(grid.width, grid.height, 0, 'i')
+
+    for x, top, bottom, region in runs:
+        labels.fill_rect(x, top, 1, bottom - top, region)
+
+    return labels, sizes
+
+def run_pattern(grid, value):
+
+    # Single-byte cells can be scanned for runs by the regex engine
+    # directly over the grid's buffer.
+
+    if grid.data.itemsize != 1:
+        return None
+
+    return re.compile(
+        re.escape(array(grid.typecode, [value]).tobytes()) + b'+'
+    )
@@ -0,0 +1,232 @@
+from fractions import Fraction
+from math import gcd
+
+# Delaunay triangulation (Bowyer-Watson) and the Gabriel graph derived
+# from it. Coordinates are scaled to integers first so every predicate is
+# exact, which matters because room centers on a grid are very often
+# collinear or cocircular.
+
+def delaunay_triangles(points):
+
+    # Returns (vertices, neighbours, alive) for every triangle created.
+    # Vertices are listed counter-clockwise; neighbours[t][i] is the
+    # triangle across the edge opposite vertex i, or -1. Indices from
+    # len(points) up are the three vertices of the enclosing triangle.
+
+    n = len(points)
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+
+    min_x = min(xs)
+    min_y = min(ys)
+    span = max(max(xs) - min_x, max(ys) - min_y, 1)
+    mid_x = min_x + span // 2
+    mid_y = min_y + span // 2
+
+    xs += [mid_x - 64 * span, mid_x + 64 * span, mid_x]
+    ys += [mid_y - 64 * span, mid_y - 64 * span, mid_y + 64 * span]
+
+    vertices = [[n, n + 1, n + 2]]
+    neighbours = [[-1, -1, -1]]
+    alive = [True]
+
+    def orient(a, b, p):
+
+        return (
+            (xs[b] - xs[a]) * (ys[p] - ys[a])
+            - (ys[b] - ys[a]) * (xs[p] - xs[a])
+        )
+
+    def in_circle(t, p):
+
+        a, b, c = vertices[t]
+        px = xs[p]
+        py = ys[p]
+
+        adx = xs[a] - px
+        ady = ys[a] - py
+        bdx = xs[b] - px
+        bdy = ys[b] - py
+        cdx = xs[c] - px
+        cdy = ys[c] - py
+
+        return (
+            (adx * adx + ady * ady) * (bdx * cdy - cdx * bdy)
+            + (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy)
+            + (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady)
+        ) > 0
+
+    last = 0
+
+    for p in insertion_order(xs[:n], ys[:n], span):
+        t = last
+
+        walking = True
+        while walking:
+            walking = False
+            v = vertices[t]
+
+            for i in range(3):
+                if orient(v[(i + 1) % 3], v[(i + 2) % 3], p) < 0:
+                    t = neighbours[t][i]
+                    walking = True
+                    break
+
+        cavity = set([t])
+        stack = [t]
+
+        while len(stack) > 0:
+            c = stack.pop()
+
+            for o in neighbours[c]:
+                if o != -1 and o not in cavity and in_circle(o, p):
+                    cavity.add(o)
+                    stack.append(o)
+
+        starts = dict()
+        ends = dict()
+        created = []
+
+        for c in cavity:
+            alive[c] = False
+            v = vertices[c]
+
+            for i in range(3):
+                o = neighbours[c][i]
+
+                if o != -1 and o in cavity:
+                    continue
+
+                a = v[(i + 1) % 3]
+                b = v[(i + 2) % 3]
+                new = len(vertices)
+
+                vertices.append([a, b, p])
+                neighbours.append([-1, -1, o])
+                alive.append(True)
+
+                if o != -1:
+                    on = neighbours[o]
+                    on[on.index(c)] = new
+
+                starts[a] = new
+                ends[b] = new
+                created.append(new)
+
+        for new in created:
+            a, b, c = vertices[new]
+            neighbours[new][0] = starts[b]
+            neighbours[new][1] = ends[a]
+
+        last = created[-1]
+
+    return vertices, neighbours, alive
+
+def gabriel_edges(points):
+
+    # Returns the index pairs (i, j), i < j, of every pair of points whose
+    # closed diametral circle holds no other point, in sorted order.
+
+    if len(points) < 2:
+        return []
+
+    scaled = integer_points(points)
+
+    groups = dict()
+    for i in range(len(scaled)):
+        groups.setdefault(scaled[i], []).append(i)
+
+    unique = list(groups.keys())
+    members = list(groups.values())
+    edges = []
+
+    for group in members:
+        if len(group) == 2:
+            edges.append((group[0], group[1]))
+
+    if len(unique) > 1:
+        vertices, neighbours, alive = delaunay_triangles(unique)
+        n = len(unique)
+
+        def blocks(a, b, c):
+
+            if c >= n:
+                return False
+
+            pa = unique[a]
+            pb = unique[b]
+            pc = unique[c]
+
+            return (
+                (pa[0] - pc[0]) * (pb[0] - pc[0])
+                + (pa[1] - pc[1]) * (pb[1] - pc[1])
+            ) <= 0
+
+        for t in range(len(vertices)):
+            if not alive[t]:
+                continue
+
+            v = vertices[t]
+
+            for i in range(3):
+                a = v[(i + 1) % 3]
+                b = v[(i + 2) % 3]
+                o = neighbours[t][i]
+
+                if a >= n or b >= n or (o != -1 and o < t):
+                    continue
+
+                if len(members[a]) > 1 or len(members[b]) > 1:
+                    continue
+
+                if blocks(a, b, v[i]):
+                    continue
+
+                if o != -1:
+                    w = vertices[o]
+                    if blocks(a, b, w[3 - w.index(a) - w.index(b)]):
+                        continue
+
+                i1 = members[a][0]
+                i2 = members[b][0]
+                edges.append((min(i1, i2), max(i1, i2)))
+
+    edges.sort()
+    return edges
+
+def insertion_order(xs, ys, span):
+
+    # Visits points bucket by bucket in a boustrophedon order so each
+    # point is located by a short walk from the previous insertion.
+
+    n = len(xs)
+    cells = max(1, int((n / 4) ** 0.5))
+    size = span // cells + 1
+    min_x = min(xs)
+    min_y = min(ys)
+
+    def key(i):
+
+        row = (ys[i] - min_y) // size
+        column = (xs[i] - min_x) // size
+
+        return (row, column if row % 2 == 0 else -column, xs[i], ys[i])
+
+    return sorted(range(n), key=key)
+
+def integer_points(points):
+
+    coordinates = [
+        (Fraction(p.x), Fraction(p.y))
+        for p in points
+    ]
+
+    scale = 1
+    for x, y in coordinates:
+        for value in (x, y):
+            scale = scale * value.denominator // gcd(scale, value.denominator)
+
+    return [
+        (int(x * scale), int(y * scale))
+        for x, y in coordinates
+    ]
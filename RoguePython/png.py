@@ -0,0 +1,121 @@
+import struct
+import zlib
+
+# Minimal PNG support for 8-bit, non-interlaced images so glyph sheets can
+# be read and frames written without wx.
+
+channels = {
+    0: 1,
+    2: 3,
+    4: 2,
+    6: 4
+}
+
+def read_png(path):
+
+    # Returns (width, height, channels, pixels) where pixels is a bytearray
+    # of width * height * channels samples, row by row.
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if data[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ValueError(path + ' is not a PNG file')
+
+    position = 8
+    compressed = []
+    header = None
+
+    while position < len(data):
+        length, kind = struct.unpack('>I4s', data[position:position + 8])
+        chunk = data[position + 8:position + 8 + length]
+        position += 12 + length
+
+        if kind == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif kind == b'IDAT':
+            compressed.append(chunk)
+        elif kind == b'IEND':
+            break
+
+    width, height, depth, color_type, _, _, interlace = header
+
+    if depth != 8 or interlace != 0 or color_type not in channels:
+        raise ValueError(
+            path + ' must be an 8-bit, non-interlaced grey or RGB image'
+        )
+
+    samples = channels[color_type]
+    stride = width * samples
+    raw = zlib.decompress(b''.join(compressed))
+
+    pixels = bytearray(stride * height)
+    previous = bytearray(stride)
+
+    for y in range(height):
+        start = y * (stride + 1)
+        kind = raw[start]
+        row = bytearray(raw[start + 1:start + 1 + stride])
+
+        if kind == 1:
+            for i in range(samples, stride):
+                row[i] = (row[i] + row[i - samples]) & 0xFF
+        elif kind == 2:
+            for i in range(stride):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif kind == 3:
+            for i in range(stride):
+                left = row[i - samples] if i >= samples else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            for i in range(stride):
+                a = row[i - samples] if i >= samples else 0
+                b = previous[i]
+                c = previous[i - samples] if i >= samples else 0
+                p = a + b - c
+                pa = abs(p - a)
+                pb = abs(p - b)
+                pc = abs(p - c)
+
+                if pa <= pb and pa <= pc:
+                    predictor = a
+                elif pb <= pc:
+                    predictor = b
+                else:
+                    predictor = c
+
+                row[i] = (row[i] + predictor) & 0xFF
+
+        pixels[y * stride:(y + 1) * stride] = row
+        previous = row
+
+    return width, height, samples, pixels
+
+def write_png(path, width, height, pixels):
+
+    # pixels holds width * height RGB triples, row by row.
+
+    stride = width * 3
+    raw = bytearray()
+
+    for y in range(height):
+        raw.append(0)
+        raw += pixels[y * stride:(y + 1) * stride]
+
+    def chunk(kind, data):
+
+        return (
+            struct.pack('>I', len(data))
+            + kind
+            + data
+            + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(
+            b'IHDR',
+            struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+        ))
+        f.write(chunk(b'IDAT', zlib.compress(bytes(raw), 6)))
+        f.write(chunk(b'IEND', b''))
@@ -1,8 +1,24 @@
 from time import time
 from math import sqrt, log
 
+def mash_codes(n, codes):
+	for code in codes:
+		n += code
+		h = 0.02519603282416938 * n
+		n = int(h)
+		h -= n
+		h *= n
+		n = int(h)
+		h -= n
+		n += h * 0x100000000
+
+	return n, int(n) * 2.3283064365386963e-10
+
 class RNG():
+	base_state = None
+
 	seed = []
+	spawned = 0
 
 	n = 0
 	k0 = 0
@@ -11,27 +27,63 @@ class RNG():
 	k3 = 0
 	s = []
 
-	def __init__(self):
-		self.set_seed()
+	def __init__(self, *arguments):
+		self.set_seed(*arguments)
 
 	def mash(self, data):
-		data_str = str(data)
+		self.n, value = mash_codes(self.n, [ord(c) for c in str(data)])
+		return value
+
+	def fill(self, buffer):
+		s = self.s
+		k0 = self.k0
+		k1 = self.k1
+		k2 = self.k2
+		k3 = self.k3
+
+		for i in range(len(buffer)):
+			k0 = (k0 + 1) & 255
+			k1 = (k1 + 1) & 255
+			k2 = (k2 + 1) & 255
+			k3 = (k3 + 1) & 255
+
+			x = s[k0] - s[k1]
+			if x < 0:
+				x += 1
+
+			x -= s[k2]
+			if x < 0:
+				x += 1
+
+			x -= s[k3]
+			if x < 0:
+				x += 1
 
-		for i in range(len(data_str)):
-			self.n += ord(data_str[i])
-			h = 0.02519603282416938 * self.n
-			self.n = int(h)
-			h -= self.n
-			h *= self.n
-			self.n = int(h)
-			h -= self.n
-			self.n += h * 0x100000000
+			s[k0] = x
+			buffer[i] = x
 
-		return int(self.n) * 2.3283064365386963e-10;
+		self.k0 = k0
+		self.k1 = k1
+		self.k2 = k2
+		self.k3 = k3
+
+		return buffer
 
 	def get_seed(self):
 		return self.seed
 
+	def getstate(self):
+		return (
+			tuple(self.s),
+			self.k0,
+			self.k1,
+			self.k2,
+			self.k3,
+			self.n,
+			tuple(self.seed),
+			self.spawned
+		)
+
 	def normal(self, mean = 0, std = 1):
 		r = 0
 
@@ -74,16 +126,34 @@ class RNG():
 		self.s[self.k0] = x
 		return x
 
+	def random_batch(self, n):
+		return self.fill([0.0] * n)
+
 	def random_range(self, min, max):
 		return int(self.random() * (max - min + 1)) + min
 
+	def random_range_batch(self, min, max, n):
+		span = max - min + 1
+		return [int(x * span) + min for x in self.random_batch(n)]
+
 	def set_seed(self, *arguments):
-		self.s = []
-		self.n = 0xefc8249d
-		self.k0 = 0
-		self.k1 = 58
-		self.k2 = 119
-		self.k3 = 178
+		if RNG.base_state is None:
+			s = []
+			n = 0xefc8249d
+			space = [ord(" ")]
+
+			for j in range(256):
+				n, value = mash_codes(n, space)
+				s.append(value)
+				n, value = mash_codes(n, space)
+				s[j] -= value * 4.76837158203125e-7
+				if s[j] < 0:
+					s[j] += 1
+
+			RNG.base_state = (tuple(s), n)
+
+		s = list(RNG.base_state[0])
+		n = RNG.base_state[1]
 
 		if len(arguments) == 0:
 			args = [time()]
@@ -92,17 +162,45 @@ class RNG():
 
 		self.seed = []
 
-		for j in range(256):
-			self.s.append(self.mash(" "))
-			self.s[j] -= self.mash(" ") * 4.76837158203125e-7
-			if self.s[j] < 0:
-				self.s[j] += 1
-
 		for i in range(len(args)):
 			self.seed.append(args[i])
+			codes = [ord(c) for c in str(args[i])]
 
 			for j in range(256):
-				self.s[j] -= self.mash(args[i])
-				self.s[j] -= self.mash(args[i]) * 4.76837158203125e-7
-				if self.s[j] < 0:
-					self.s[j] += 1
+				n, value = mash_codes(n, codes)
+				s[j] -= value
+				n, value = mash_codes(n, codes)
+				s[j] -= value * 4.76837158203125e-7
+				if s[j] < 0:
+					s[j] += 1
+
+		self.s = s
+		self.n = n
+		self.spawned = 0
+		self.k0 = 0
+		self.k1 = 58
+		self.k2 = 119
+		self.k3 = 178
+
+	def setstate(self, state):
+		(
+			s,
+			self.k0,
+			self.k1,
+			self.k2,
+			self.k3,
+			self.n,
+			seed,
+			self.spawned
+		) = state
+		self.s = list(s)
+		self.seed = list(seed)
+
+	def spawn(self, count):
+		streams = [self.stream(self.spawned + i) for i in range(count)]
+		self.spawned += count
+
+		return streams
+
+	def stream(self, index):
+		return RNG(*self.seed, 'stream:' + str(index))
@@ -0,0 +1,78 @@
+from collections import deque
+
+class FrameStats():
+
+    # Rolling per-stage frame timings in seconds. Every recorded frame is
+    # a dict of stage name to duration; frames whose total goes over the
+    # budget are counted against the stage that took the longest.
+
+    def __init__(self, stages, window=240, budget=1 / 60):
+
+        self.stages = list(stages)
+        self.window = window
+        self.budget = budget
+
+        self.reset()
+
+    def percentile(self, values, fraction):
+
+        if len(values) == 0:
+            return 0
+
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+
+        return ordered[index]
+
+    def record(self, timings):
+
+        total = 0
+
+        for stage in self.stages:
+            duration = timings.get(stage, 0)
+            self.samples[stage].append(duration)
+            total += duration
+
+        self.samples['frame'].append(total)
+        self.frames += 1
+
+        if total > self.budget:
+            self.over_budget += 1
+            slowest = max(self.stages, key=lambda s: timings.get(s, 0))
+            self.over_budget_stages[slowest] += 1
+
+    def reset(self):
+
+        self.samples = dict(
+            (stage, deque(maxlen=self.window))
+            for stage in self.stages + ['frame']
+        )
+
+        self.frames = 0
+        self.over_budget = 0
+        self.over_budget_stages = dict((stage, 0) for stage in self.stages)
+
+    def set_budget(self, budget):
+
+        self.budget = budget
+
+    def summary(self):
+
+        stages = dict()
+
+        for stage, values in self.samples.items():
+            stages[stage] = {
+                'mean': sum(values) / len(values) if len(values) > 0 else 0,
+                'p50': self.percentile(values, 0.5),
+                'p95': self.percentile(values, 0.95),
+                'p99': self.percentile(values, 0.99),
+                'max': max(values) if len(values) > 0 else 0
+            }
+
+        return {
+            'frames': self.frames,
+            'budget': self.budget,
+            'over_budget': self.over_budget,
+            'over_budget_stages': dict(self.over_budget_stages),
+            'stages': stages
+        }
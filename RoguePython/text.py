@@ -0,0 +1,108 @@
+import re
+from array import array
+from functools import lru_cache
+
+from .color import Color
+
+# Colour markup is %c{NAME} to change the foreground and %b{NAME} the
+# background, with an empty name going back to the console default.
+
+color_regex = re.compile(r'%([bc])\{([^}]*)\}')
+
+class Text():
+
+    # A markup string parsed once. runs holds (text, fg, bg) for every
+    # stretch of plain text, with colours packed as 0xBBGGRR integers or -1
+    # for the console default, and length is the printed length. Wrapped
+    # layouts are kept per width and per pair of default colours, so text
+    # drawn every frame is only laid out the first time.
+
+    def __init__(self, markup):
+
+        self.markup = markup
+        self.runs = []
+        self.layouts = dict()
+
+        fg = -1
+        bg = -1
+        index = 0
+
+        for m in color_regex.finditer(markup):
+            self.runs.append((markup[index:m.start()], fg, bg))
+
+            if len(m.group(2)) == 0:
+                value = -1
+            else:
+                value = Color[m.group(2)].value
+
+            if m.group(1) == 'b':
+                bg = value
+            else:
+                fg = value
+
+            index = m.end()
+
+        self.runs.append((markup[index:], fg, bg))
+
+        self.length = sum(len(run[0]) for run in self.runs)
+
+    def layout(self, width, default_fg, default_bg):
+
+        # Returns the wrapped lines, each a (codes, fgs, bgs) triple of
+        # arrays starting at the left edge. Words are only broken at
+        # spaces, so a word longer than width runs past it.
+
+        key = (width, default_fg, default_bg)
+        lines = self.layouts.get(key)
+
+        if lines is not None:
+            return lines
+
+        lines = []
+        codes = []
+        fgs = []
+        bgs = []
+
+        def new_line():
+
+            lines.append((
+                array('B', codes),
+                array('I', fgs),
+                array('I', bgs)
+            ))
+
+            codes.clear()
+            fgs.clear()
+            bgs.clear()
+
+        for text, fg, bg in self.runs:
+            if fg == -1:
+                fg = default_fg
+
+            if bg == -1:
+                bg = default_bg
+
+            words = text.split(' ')
+
+            for j in range(len(words)):
+                word = words[j]
+
+                if len(codes) + len(word) + (0 if j == 0 else 1) > width:
+                    new_line()
+
+                if j > 0 and len(codes) > 0:
+                    word = ' ' + word
+
+                codes.extend(map(ord, word))
+                fgs.extend([fg] * len(word))
+                bgs.extend([bg] * len(word))
+
+        new_line()
+
+        self.layouts[key] = lines
+        return lines
+
+@lru_cache(maxsize=1024)
+def compile_text(markup):
+
+    return Text(markup)
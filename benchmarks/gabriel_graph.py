@@ -0,0 +1,81 @@
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from RoguePython.maps.geometry import Rectangle, distance_sq, midpoint
+from RoguePython.maps.map import Map
+from RoguePython.rng import RNG
+
+def brute_force_edges(rooms):
+
+    # The original O(n^3) construction, kept here for comparison.
+
+    centers = [room.center() for room in rooms]
+    edges = []
+
+    for a in range(len(centers) - 1):
+        for b in range(a + 1, len(centers)):
+            mp = midpoint(centers[a], centers[b])
+            radius_sq = distance_sq(centers[a], mp)
+
+            if not any(
+                distance_sq(mp, centers[c]) <= radius_sq
+                for c in range(len(centers))
+                if c != a and c != b
+            ):
+                edges.append((a, b))
+
+    return edges
+
+def random_rooms(rng, count):
+
+    # Rooms on a grid of 20x20 cells, like GridGenerator, so many centers
+    # are collinear or cocircular.
+
+    side = int(count ** 0.5) + 1
+    cells = rng.random_batch(count * 4)
+    rooms = []
+
+    for i in range(count):
+        width = 8 + int(cells[i * 4] * 12)
+        height = 8 + int(cells[i * 4 + 1] * 12)
+        rooms.append(Rectangle(
+            (i % side) * 20 + int(cells[i * 4 + 2] * (20 - width)),
+            (i // side) * 20 + int(cells[i * 4 + 3] * (20 - height)),
+            width,
+            height
+        ))
+
+    return rooms
+
+def main():
+
+    rng = RNG(1492718583.865769)
+    level = Map(0, 0, rng)
+
+    print('rooms      edges   gabriel (s)   brute force (s)')
+
+    for count in [10, 100, 300, 1000, 3000, 10000]:
+        rooms = random_rooms(rng, count)
+
+        start = perf_counter()
+        edges = level.create_gabriel_graph(rooms)
+        elapsed = perf_counter() - start
+
+        brute = '-'
+        if count <= 300:
+            start = perf_counter()
+            expected = brute_force_edges(rooms)
+            brute = '%.4f' % (perf_counter() - start)
+
+            index = dict((id(room), i) for i, room in enumerate(rooms))
+            found = [(index[id(e.node1)], index[id(e.node2)]) for e in edges]
+            if found != expected:
+                raise AssertionError('Edge sets differ for %d rooms' % count)
+
+        print('%5d  %9d  %12.4f  %16s' % (count, len(edges), elapsed, brute))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+
+# Imports rp in a fresh interpreter for the headless path (maps and RNG
+# only) and checks that it stays within budget and never pulls in wx or
+# NumPy, which is only loaded once something needs it.
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+budget = 0.1
+runs = 5
+
+probe = '''
+import sys
+from time import perf_counter
+start = perf_counter()
+import rp
+rp.maps.BSPMap
+rp.rng
+elapsed = perf_counter() - start
+print(elapsed, 'wx' in sys.modules, 'numpy' in sys.modules, len(sys.modules))
+'''
+
+def measure():
+
+    output = subprocess.run(
+        [sys.executable, '-c', probe],
+        cwd=root,
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout.split()
+
+    return (
+        float(output[0]),
+        output[1] == 'True',
+        output[2] == 'True',
+        int(output[3])
+    )
+
+def main():
+
+    results = [measure() for i in range(runs)]
+    best = min(r[0] for r in results)
+    wx_loaded = any(r[1] for r in results)
+    numpy_loaded = any(r[2] for r in results)
+
+    print('import rp (maps + rng): best of %d %.1f ms, %d modules' % (
+        runs,
+        best * 1000,
+        results[0][3]
+    ))
+
+    if wx_loaded:
+        print('FAIL: wx was imported')
+        sys.exit(1)
+
+    if numpy_loaded:
+        print('FAIL: numpy was imported')
+        sys.exit(1)
+
+    if best > budget:
+        print('FAIL: over the %.0f ms budget' % (budget * 1000))
+        sys.exit(1)
+
+    print('OK: within the %.0f ms budget' % (budget * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -11,12 +11,13 @@ def main():
     height = generator.get_height()
     display = rp.display(width, height, rp.font.ATI_8X8)
 
-    for x in range(width):
-        for y in range(height):
-            if (level_map[x][y] == 1):
-                display.put_character('.', x, y)
-            else:
-                display.put_character('#', x, y, rp.Color.GOLDENROD)
+    display.put_array(
+        level_map,
+        {
+            0: ('#', rp.Color.GOLDENROD, -1),
+            1: ('.', -1, -1)
+        }
+    )
 
     display.start()
 
@@ -1,11 +1,36 @@
-from RoguePython.color import Color
-from RoguePython.display import Display
-from RoguePython.font import Font
+from importlib import import_module
+
 from RoguePython import levelmaps
 from RoguePython.rng import RNG
 
-color = Color
-display = Display
-font = Font
 rng = RNG
 maps = levelmaps
+
+# Everything that draws is loaded on first use, so map generation and the
+# RNG can be imported without wx, e.g. in batch worker processes.
+
+lazy = {
+    'Color': ('RoguePython.color', 'Color'),
+    'Display': ('RoguePython.display', 'Display'),
+    'Font': ('RoguePython.font', 'Font'),
+    'HeadlessDisplay': ('RoguePython.headless', 'HeadlessDisplay'),
+    'color': ('RoguePython.color', 'Color'),
+    'display': ('RoguePython.display', 'Display'),
+    'font': ('RoguePython.font', 'Font'),
+    'headless': ('RoguePython.headless', 'HeadlessDisplay')
+}
+
+def __getattr__(name):
+
+    if name not in lazy:
+        raise AttributeError("module 'rp' has no attribute " + repr(name))
+
+    module, attribute = lazy[name]
+    value = getattr(import_module(module), attribute)
+    globals()[name] = value
+
+    return value
+
+def __dir__():
+
+    return sorted(set(globals()) | set(lazy))